@@ -1,15 +1,28 @@
+import click
 from flask import Flask, render_template
 from dotenv import load_dotenv
+import json
 import os
+import sqlite3
 from datetime import timedelta
 
-from core.db import init_db
+from core.assets import init_assets, precompress_static
+from core.db import DB_PATH, archive_year, init_db
+from core.maintenance import DEFAULT_KEEP, backup_archives, run_if_due, start_scheduler
+from core.week_history import SNAPSHOT_EVERY, compact_week_history
+from core.writer import write_lock
 from routes.upload import upload_bp
 from routes.weeks import weeks_bp
 from routes.settings import settings_bp
 from routes.dashboard import dashboard_bp
 from routes.api_workers import api_workers_bp
+from routes.api_attendance import api_attendance_bp
+from routes.api_anomalies import api_anomalies_bp
+from routes.api_jobs import api_jobs_bp
+from routes.api_changes import api_changes_bp
 from routes.auth import auth_bp
+from routes.snapshots import snapshots_bp
+from services.snapshot_service import build_snapshots, remove_legacy_snapshots
 
 load_dotenv()
 
@@ -23,6 +36,18 @@ def create_app():
 
     app.permanent_session_lifetime = timedelta(days=30)
     app.config["UPLOAD_FOLDER"] = "uploads"
+    app.config["AUTO_SNAPSHOTS"] = os.environ.get("WUKOND_AUTO_SNAPSHOTS") == "1"
+    app.config["SNAPSHOT_ACCEL"] = os.environ.get("WUKOND_SNAPSHOT_ACCEL")
+    remove_legacy_snapshots(app.static_folder)
+
+    keep_backups = int(os.environ.get("WUKOND_BACKUP_KEEP", DEFAULT_KEEP))
+    if keep_backups < 1:
+        raise RuntimeError("WUKOND_BACKUP_KEEP must be at least 1")
+    maintenance_hours = os.environ.get("WUKOND_MAINTENANCE_HOURS")
+    if maintenance_hours:
+        start_scheduler(app, timedelta(hours=float(maintenance_hours)), keep=keep_backups)
+
+    init_assets(app)
 
     @app.before_request
     def setup():
@@ -31,9 +56,14 @@ def create_app():
     app.register_blueprint(auth_bp)
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(api_workers_bp)
+    app.register_blueprint(api_attendance_bp)
+    app.register_blueprint(api_anomalies_bp)
+    app.register_blueprint(api_jobs_bp)
+    app.register_blueprint(api_changes_bp)
     app.register_blueprint(upload_bp)
     app.register_blueprint(weeks_bp)
     app.register_blueprint(settings_bp)
+    app.register_blueprint(snapshots_bp)
 
     @app.errorhandler(404)
     def not_found(e):
@@ -47,6 +77,66 @@ def create_app():
     def value_error(e):
         return render_template("error.html", code=400, message=str(e)), 400
 
+    @app.cli.command("build-snapshots")
+    def build_snapshots_command():
+        """Pre-render dashboard and week JSON into instance/snapshots."""
+        init_db()
+        summary = build_snapshots()
+        click.echo(
+            f"Snapshots written: {summary['workers']} worker(s), {summary['weeks']} week(s)."
+        )
+
+    @app.cli.command("build-assets")
+    def build_assets_command():
+        """Write gzip/brotli variants of the static assets."""
+        count = precompress_static(app.static_folder)
+        click.echo(f"Precompressed {count} static file(s).")
+
+    @app.cli.command("archive-year")
+    @click.argument("year", type=int)
+    def archive_year_command(year):
+        """Move a past year into its own read-only database file."""
+        init_db()
+        try:
+            with write_lock("archive", timeout=300):
+                counts = archive_year(year)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        # The year now exists in a single file; back it up right away
+        copied = backup_archives()
+        click.echo(
+            f"Archived {year}: {counts['weeks']} week(s), {counts['attendance']} attendance"
+            f" and {counts['payroll_reference']} payroll row(s). Backup: {', '.join(copied) or 'up to date'}."
+        )
+
+    @app.cli.command("compact-week-history")
+    @click.option("--every", default=SNAPSHOT_EVERY, show_default=True, help="Deltas between full snapshots.")
+    def compact_week_history_command(every):
+        """Rewrite long delta chains in the week history as full snapshots."""
+        init_db()
+        with write_lock("compact", timeout=300):
+            conn = sqlite3.connect(DB_PATH, timeout=30)
+            try:
+                with conn:
+                    count = compact_week_history(conn, every)
+            finally:
+                conn.close()
+        click.echo(f"Compacted {count} week version(s) into snapshots.")
+
+    @app.cli.command("maintenance")
+    @click.option(
+        "--keep", default=keep_backups, type=click.IntRange(min=1), show_default=True,
+        help="Backups to retain.",
+    )
+    def maintenance_command(keep):
+        """Checkpoint, vacuum, integrity-check and back up the database."""
+        result = run_if_due(timedelta(0), keep=keep)
+        if result is None:
+            raise click.ClickException("Maintenance is already running in another process.")
+        click.echo(json.dumps(result, indent=2))
+        if not result["integrity_ok"]:
+            raise SystemExit(1)
+
     return app
 
 
@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import os
+from pathlib import Path
+
+from flask import request, send_file
+
+try:
+    import brotli
+except ImportError:  # optional: gzip alone covers every browser
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+    "text/css",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+}
+PRECOMPRESS_SUFFIXES = {".css", ".js", ".json", ".svg", ".ico", ".html", ".txt"}
+MIN_COMPRESS_SIZE = 1024
+LONG_CACHE = "public, max-age=31536000, immutable"
+
+_hashes: dict[str, tuple[float, str]] = {}
+
+
+def static_hash(static_folder: str, filename: str) -> str | None:
+    """
+    Short content hash of a static file, recomputed only when its mtime
+    changes. Returns None for anything that is not a regular file.
+    """
+    path = os.path.join(static_folder, filename)
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    if not os.path.isfile(path):
+        return None
+
+    cached = _hashes.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    _hashes[path] = (mtime, digest)
+    return digest
+
+
+def _accepted_encoding() -> str | None:
+    accept = request.accept_encodings
+    if brotli and accept["br"]:
+        return "br"
+    if accept["gzip"]:
+        return "gzip"
+    return None
+
+
+def _precompressed(path: str, encoding: str) -> str | None:
+    """A build-time variant is only used while it is newer than its source."""
+    variant = path + (".br" if encoding == "br" else ".gz")
+    try:
+        if os.stat(variant).st_mtime >= os.stat(path).st_mtime:
+            return variant
+    except OSError:
+        pass
+    return None
+
+
+def init_assets(app):
+    """
+    Every url_for('static', ...) gets a ?v=<content hash>, so fingerprinted
+    URLs change whenever the file does and can be cached for a year. Dynamic
+    responses above a size threshold are compressed on the fly; static files
+    use the variants written by `flask build-assets` when present.
+    """
+
+    @app.url_defaults
+    def fingerprint_static(endpoint, values):
+        if endpoint == "static" and "filename" in values and "v" not in values:
+            digest = static_hash(app.static_folder, values["filename"])
+            if digest:
+                values["v"] = digest
+
+    @app.after_request
+    def compress_response(response):
+        if request.endpoint == "static":
+            return _static_response(app, response)
+
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = _accepted_encoding()
+        data = response.get_data()
+        if not encoding or len(data) < MIN_COMPRESS_SIZE:
+            return response
+
+        if encoding == "br":
+            response.set_data(brotli.compress(data, quality=5))
+        else:
+            response.set_data(gzip.compress(data, compresslevel=6))
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+
+def _static_response(app, response):
+    if response.status_code != 200:
+        return response
+
+    filename = (request.view_args or {}).get("filename", "")
+    path = os.path.join(app.static_folder, filename)
+    encoding = _accepted_encoding()
+    variant = _precompressed(path, encoding) if encoding else None
+
+    if variant:
+        compressed = send_file(variant, mimetype=response.mimetype, conditional=True)
+        compressed.headers["Content-Encoding"] = encoding
+        response.close()
+        response = compressed
+
+    response.vary.add("Accept-Encoding")
+    # A stale or hand-written ?v= must not pin the wrong content for a year
+    version = request.args.get("v")
+    if version and version == static_hash(app.static_folder, filename):
+        response.headers["Cache-Control"] = LONG_CACHE
+    return response
+
+
+def precompress_static(static_folder) -> int:
+    """Write .gz (and .br when brotli is installed) next to every text asset."""
+    count = 0
+    for path in Path(static_folder).rglob("*"):
+        if not path.is_file() or path.suffix not in PRECOMPRESS_SUFFIXES:
+            continue
+        data = path.read_bytes()
+        Path(f"{path}.gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli:
+            Path(f"{path}.br").write_bytes(brotli.compress(data, quality=11))
+        count += 1
+    return count
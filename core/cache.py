@@ -0,0 +1,60 @@
+import json
+import sqlite3
+
+from core.changes import latest_revision
+
+
+def get_cached(db, key: str, compute):
+    """
+    Derived payloads (worker stats, charts, week grids) are stored in the DB
+    rather than in process memory so every gunicorn worker shares one warm
+    cache. Entries are dropped by the writes that make them stale.
+    """
+    row = db.execute("SELECT payload FROM payload_cache WHERE key = ?", (key,)).fetchone()
+    if row:
+        return json.loads(row["payload"])
+
+    # Taken before computing: an import committing meanwhile moves it on
+    rev = latest_revision(db)
+    value = compute()
+    store(db, key, value, rev)
+    return value
+
+
+def store(db, key: str, value, rev: int) -> None:
+    """
+    Filling the cache is best effort: a reader must never fail just because
+    an import currently holds the write lock.
+
+    The entry is only written while `rev`, the data revision the value was
+    computed under, is still the latest. Otherwise a reader that computed
+    from pre-import data could store it after the import's invalidation.
+    """
+    try:
+        with db:
+            db.execute(
+                """
+                INSERT OR REPLACE INTO payload_cache (key, payload)
+                SELECT ?, ?
+                WHERE (SELECT COALESCE(MAX(id), 0) FROM revisions) = ?
+                """,
+                (key, json.dumps(value, separators=(",", ":")), rev),
+            )
+    except sqlite3.OperationalError:
+        pass
+
+
+def invalidate_workers(conn, worker_ids) -> None:
+    for worker_id in worker_ids:
+        conn.execute(
+            "DELETE FROM payload_cache WHERE key IN (?, ?)",
+            (f"stats:{worker_id}", f"charts:{worker_id}"),
+        )
+
+
+def invalidate_week(conn, year: int, kw: int) -> None:
+    conn.execute("DELETE FROM payload_cache WHERE key = ?", (f"week:{year}:{kw}",))
+
+
+def invalidate_prefix(conn, prefix: str) -> None:
+    conn.execute("DELETE FROM payload_cache WHERE key LIKE ?", (f"{prefix}%",))
@@ -0,0 +1,58 @@
+def record_changes(conn, source: str, workers=(), weeks=(), sites=()) -> int | None:
+    """
+    Log which entities a write touched under a new revision, inside the
+    caller's transaction so the log never disagrees with the data. Returns
+    the revision, or None when nothing changed.
+    """
+    entries = (
+        [("worker", str(w)) for w in workers]
+        + [("week", f"{year}-{kw}") for year, kw in weeks]
+        + [("site", str(s)) for s in sites]
+    )
+    if not entries:
+        return None
+
+    rev = conn.execute("INSERT INTO revisions (source) VALUES (?)", (source,)).lastrowid
+    conn.executemany(
+        "INSERT OR IGNORE INTO change_log (rev, entity, entity_key) VALUES (?, ?, ?)",
+        [(rev, entity, key) for entity, key in entries],
+    )
+    return rev
+
+
+def latest_revision(db) -> int:
+    return db.execute("SELECT COALESCE(MAX(id), 0) FROM revisions").fetchone()[0]
+
+
+def changes_since(db, since: int) -> dict:
+    """
+    Entities touched after revision `since`, collapsed across revisions.
+    The returned `rev` is what the client passes as `since` next time.
+    """
+    rev = latest_revision(db)
+    rows = db.execute(
+        """
+        SELECT DISTINCT entity, entity_key
+        FROM change_log
+        WHERE rev > ? AND rev <= ?
+        """,
+        (since, rev),
+    ).fetchall()
+
+    workers, weeks, sites = set(), set(), set()
+    for entity, key in rows:
+        if entity == "worker":
+            workers.add(int(key))
+        elif entity == "week":
+            year, kw = key.split("-")
+            weeks.add((int(year), int(kw)))
+        elif entity == "site":
+            sites.add(int(key))
+
+    return {
+        "rev": rev,
+        "since": since,
+        "workers": sorted(workers),
+        "weeks": [{"year": y, "kw": k} for y, k in sorted(weeks)],
+        "sites": sorted(sites),
+    }
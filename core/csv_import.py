@@ -1,11 +1,19 @@
+import codecs
 import csv
 import datetime
 import sqlite3
 import re
-from typing import BinaryIO
+from typing import BinaryIO, Iterable, Iterator
+
+from core.cache import invalidate_prefix, invalidate_week, invalidate_workers
+from core.changes import record_changes
+from core.week_history import record_week_version, week_state
 
 DAYS = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado"]
 
+CHUNK_SIZE = 64 * 1024
+MAX_LINE_BYTES = 64 * 1024  # no real row comes close; guards against garbage uploads
+
 
 def normalize_name(name: str) -> str:
     """
@@ -28,14 +36,122 @@ def parse_money(value: str | None) -> int | None:
     return int("".join(digits)) if digits else None
 
 
-def read_csv(file: BinaryIO) -> list[list[str]]:
+def _iter_lines(file: BinaryIO, errors: list) -> Iterator[tuple[int, str]]:
+    """
+    Split the upload into decoded (line number, text) pairs, reading it in
+    fixed chunks so at most one chunk plus one line is ever held.
+
+    Both encodings we see are ASCII-compatible, so lines can be split on the
+    raw bytes. Decoding starts as UTF-8 and switches to cp1252 (Excel's
+    "CSV (;)" export on Windows) at the first line that is not valid UTF-8,
+    unless UTF-8 text was already seen. In that case the line is decoded
+    with replacement characters and reported instead of guessed.
+    """
+    encoding = "utf-8"
+    seen_utf8 = False
+
+    def decode(lineno, raw):
+        nonlocal encoding, seen_utf8
+        raw = raw.rstrip(b"\r")
+        if lineno == 1 and raw.startswith(codecs.BOM_UTF8):
+            raw = raw[len(codecs.BOM_UTF8):]
+        try:
+            text = raw.decode(encoding)
+        except UnicodeDecodeError:
+            if encoding == "utf-8" and not seen_utf8:
+                encoding = "cp1252"
+                return decode(lineno, raw)
+            errors.append({"line": lineno, "message": f"Characters that are not valid {encoding} were replaced"})
+            return raw.decode(encoding, errors="replace")
+        if encoding == "utf-8" and not raw.isascii():
+            seen_utf8 = True
+        return text
+
+    lineno = 0
+    pending = b""
+    overflow = False
+    while chunk := file.read(CHUNK_SIZE):
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for raw in lines:
+            lineno += 1
+            if overflow or len(raw) > MAX_LINE_BYTES:
+                overflow = False
+                errors.append({"line": lineno, "message": f"Line longer than {MAX_LINE_BYTES} bytes was skipped"})
+                continue
+            yield lineno, decode(lineno, raw)
+        if len(pending) > MAX_LINE_BYTES:
+            overflow = True
+            pending = b""
+
+    if overflow:
+        errors.append({"line": lineno + 1, "message": f"Line longer than {MAX_LINE_BYTES} bytes was skipped"})
+    elif pending:
+        yield lineno + 1, decode(lineno + 1, pending)
+
+
+def read_csv(file: BinaryIO, errors: list | None = None) -> Iterator[list[str]]:
+    """
+    Stream ';' rows from an upload. Rows that cannot be read are skipped and
+    appended to `errors` as {"line", "message"}, so one bad line no longer
+    aborts or silently garbles the whole import.
+    """
+    if errors is None:
+        errors = []
+    lineno = 0
+
+    def lines():
+        nonlocal lineno
+        for lineno, text in _iter_lines(file, errors):
+            yield text + "\n"  # keeps newlines inside quoted fields
+
+    reader = csv.reader(lines(), delimiter=";")
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            errors.append({"line": lineno, "message": f"Unreadable row: {e}"})
+            continue
+        yield row
+
+
+def _cell_text(value) -> str:
     """
-    CSV files may come from Excel with inconsistent encodings.
-    We decode defensively and split lines ourselves to avoid crashes.
+    Worksheet cells come back typed. The pipeline expects the strings a CSV
+    export would contain, so whole floats lose their ".0" (week 14, not 14.0).
     """
-    raw = file.read()
-    text = raw.decode("utf-8", errors="replace")
-    return list(csv.reader(text.splitlines(), delimiter=";"))
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def read_xlsx_sheets(file) -> Iterator[tuple[str, Iterator[list[str]]]]:
+    """
+    Each worksheet holds one week in the same layout as the CSV export.
+    openpyxl's read-only mode parses rows lazily from the zip stream, so
+    memory stays flat no matter how large the workbook is.
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX import requires the openpyxl package")
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            rows = (
+                [_cell_text(v) for v in row]
+                for row in sheet.iter_rows(values_only=True)
+            )
+            yield sheet.title, rows
+    finally:
+        workbook.close()
 
 
 def extract_week_info(rows: list[list[str]]) -> tuple[int, int]:
@@ -100,6 +216,32 @@ def prepare_week(conn, year: int, kw: int) -> tuple[int, bool]:
     return cur.lastrowid, False
 
 
+def week_participants(conn, year: int, kw: int) -> tuple[set[int], set[int]]:
+    """
+    Workers and sites currently recorded for a week. Taken before an
+    overwrite, since workers and sites dropped from the week change too.
+    """
+    week = conn.execute(
+        "SELECT id FROM weeks WHERE year=? AND week_number=?", (year, kw)
+    ).fetchone()
+    if not week:
+        return set(), set()
+
+    workers = conn.execute(
+        """
+        SELECT worker_id FROM attendance WHERE week_id=?
+        UNION
+        SELECT worker_id FROM payroll_reference WHERE week_id=?
+        """,
+        (week["id"], week["id"]),
+    ).fetchall()
+    sites = conn.execute(
+        "SELECT DISTINCT code FROM attendance WHERE week_id=?",
+        (week["id"],),
+    ).fetchall()
+    return {r[0] for r in workers}, {r[0] for r in sites}
+
+
 def upsert_worker(cur, display_name: str) -> int:
     """
     Workers are identified by normalized names, not IDs,
@@ -170,75 +312,116 @@ def insert_payroll(cur, worker_id, week_id, salario, bonus, total, comment):
     )
 
 
-def import_csv(file, db_path="instance/app.db"):
-    rows = read_csv(file)
-    kw, year = extract_week_info(rows)
+def import_csv(file, db_path="instance/app.db", errors: list | None = None):
+    return import_rows(read_csv(file, errors), db_path=db_path)
 
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-
-    week_id, existed_before = prepare_week(conn, year, kw)
-
-    day_columns, payroll_cols = detect_columns(rows[1])
-    cur = conn.cursor()
 
-    worker_count = 0
-    attendance_count = 0
-
-    for sort_order, row in enumerate(rows[2:]):
-        if not row or not any(c.strip() for c in row):
-            continue
-
-        display_name = re.sub(r"^\s*\d+[\.\-\s]*", "", row[0].strip())
-        if not any(c.isalpha() for c in display_name):
-            continue
+def import_rows(rows: Iterable[list[str]], db_path="instance/app.db"):
+    """
+    Import one week from any row source (CSV, a worksheet). Rows are
+    consumed one at a time, so sources can stream instead of loading the
+    whole file first.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    header = next(rows, None)
+    if first is None or header is None:
+        raise ValueError("File is empty or has no header row")
+    kw, year = extract_week_info([first])
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
 
-        worker_id = upsert_worker(cur, display_name)
-        worker_count += 1
-
-        # Attendance
-        for day_idx, cols in day_columns.items():
-            for half, col_idx in enumerate(cols, start=1):
-                if col_idx >= len(row):
-                    continue
-                site_code = row[col_idx].strip()
-                if not site_code or site_code == "0":
-                    continue
-
-                site_id = upsert_site(cur, site_code)
-                insert_attendance(
-                    cur, worker_id, week_id, day_idx, half, site_id, sort_order
-                )
-                attendance_count += 1
-
-        # Payroll
-        insert_payroll(
-            cur,
-            worker_id,
-            week_id,
-            (
-                parse_money(row[payroll_cols["salario"]])
-                if payroll_cols["salario"] is not None
-                else None
-            ),
-            (
-                parse_money(row[payroll_cols["bonus"]])
-                if payroll_cols["bonus"] is not None
-                else None
-            ),
-            (
-                parse_money(row[payroll_cols["total"]])
-                if payroll_cols["total"] is not None
-                else None
-            ),
-            (
-                row[payroll_cols["comment"]].strip()
-                if payroll_cols["comment"] and payroll_cols["comment"] < len(row)
-                else None
-            ),
+    # Rows stream in during the transaction, so a failure halfway must not
+    # leave it open: closing without commit rolls it back.
+    try:
+        before = week_state(conn, year, kw)
+        previous_workers, previous_sites = week_participants(conn, year, kw)
+        week_id, existed_before = prepare_week(conn, year, kw)
+
+        day_columns, payroll_cols = detect_columns(header)
+        cur = conn.cursor()
+
+        worker_count = 0
+        attendance_count = 0
+        worker_ids = set()
+        site_ids = set()
+        known_workers = cur.execute("SELECT COUNT(*) FROM workers").fetchone()[0]
+
+        for sort_order, row in enumerate(rows):
+            if not row or not any(c.strip() for c in row):
+                continue
+            # Ragged rows (trailing cells cut off by the editor) read as empty
+            row += [""] * (len(header) - len(row))
+
+            display_name = re.sub(r"^\s*\d+[\.\-\s]*", "", row[0].strip())
+            if not any(c.isalpha() for c in display_name):
+                continue
+
+            worker_id = upsert_worker(cur, display_name)
+            worker_ids.add(worker_id)
+            worker_count += 1
+
+            # Attendance
+            for day_idx, cols in day_columns.items():
+                for half, col_idx in enumerate(cols, start=1):
+                    if col_idx >= len(row):
+                        continue
+                    site_code = row[col_idx].strip()
+                    if not site_code or site_code == "0":
+                        continue
+
+                    site_id = upsert_site(cur, site_code)
+                    site_ids.add(site_id)
+                    insert_attendance(
+                        cur, worker_id, week_id, day_idx, half, site_id, sort_order
+                    )
+                    attendance_count += 1
+
+            # Payroll
+            insert_payroll(
+                cur,
+                worker_id,
+                week_id,
+                (
+                    parse_money(row[payroll_cols["salario"]])
+                    if payroll_cols["salario"] is not None
+                    else None
+                ),
+                (
+                    parse_money(row[payroll_cols["bonus"]])
+                    if payroll_cols["bonus"] is not None
+                    else None
+                ),
+                (
+                    parse_money(row[payroll_cols["total"]])
+                    if payroll_cols["total"] is not None
+                    else None
+                ),
+                (
+                    row[payroll_cols["comment"]].strip()
+                    if payroll_cols["comment"] and payroll_cols["comment"] < len(row)
+                    else None
+                ),
+            )
+
+        invalidate_workers(conn, worker_ids | previous_workers)
+        invalidate_week(conn, year, kw)
+        if cur.execute("SELECT COUNT(*) FROM workers").fetchone()[0] != known_workers:
+            # Every week grid lists all workers, so new names show up everywhere
+            invalidate_prefix(conn, "week:")
+
+        record_changes(
+            conn,
+            "import",
+            workers=worker_ids | previous_workers,
+            weeks=[(year, kw)],
+            sites=site_ids | previous_sites,
         )
+        record_week_version(conn, year, kw, before, week_state(conn, year, kw))
 
-    conn.commit()
-    conn.close()
+        conn.commit()
+    finally:
+        conn.close()
 
     return kw, year, existed_before, worker_count, attendance_count
@@ -1,17 +1,82 @@
+import datetime
+import os
 import sqlite3
 from pathlib import Path
 
 DB_PATH = Path("instance/app.db")
+YEARS_DIR = Path("instance/years")
+
+# Tables that hold per-year data. Archived years keep their own copy of
+# these; workers and construction sites always stay in the main database.
+PARTITIONED = {
+    "weeks": "all_weeks",
+    "attendance": "all_attendance",
+    "payroll_reference": "all_payroll",
+}
+
+# Per-year joins, built inside each partition and then combined. A join of
+# two all_* views would pair every partition with every other one.
+JOINED = {
+    "all_attendance_weeks": """
+        SELECT a.*, w.year, w.week_number
+        FROM {schema}.attendance a
+        JOIN {schema}.weeks w ON w.id = a.week_id
+    """,
+    "all_payroll_weeks": """
+        SELECT p.*, w.year, w.week_number,
+            (SELECT COUNT(*) FROM {schema}.attendance a
+             WHERE a.worker_id = p.worker_id AND a.week_id = p.week_id) AS halves
+        FROM {schema}.payroll_reference p
+        JOIN {schema}.weeks w ON w.id = p.week_id
+    """,
+}
+
+
+def archived_years(years_dir=YEARS_DIR) -> list[int]:
+    return sorted(int(p.stem) for p in Path(years_dir).glob("*.db") if p.stem.isdigit())
 
 
 def get_db():
-    conn = sqlite3.connect(DB_PATH)
+    """
+    Open the main database with every archived year ATTACHed read-only.
+
+    Cross-year reads go through the TEMP views all_weeks, all_attendance and
+    all_payroll, which UNION ALL the main tables with each archive. Reads
+    that need a row's year and week use all_attendance_weeks and
+    all_payroll_weeks, which join within each file first. Reads
+    that concern a single year should use year_schema() instead, so they
+    never touch the other files.
+    """
+    conn = sqlite3.connect(f"file:{DB_PATH}", uri=True)
     conn.row_factory = sqlite3.Row
+
+    years = archived_years()
+    for year in years:
+        path = (YEARS_DIR / f"{year}.db").resolve()
+        conn.execute("ATTACH DATABASE ? AS ?", (f"file:{path}?mode=ro&immutable=1", f"y{year}"))
+
+    for table, view in PARTITIONED.items():
+        sources = [f"SELECT * FROM main.{table}"]
+        sources += [f"SELECT * FROM y{year}.{table}" for year in years]
+        conn.execute(f"CREATE TEMP VIEW {view} AS {' UNION ALL '.join(sources)}")
+
+    schemas = ["main"] + [f"y{year}" for year in years]
+    for view, select in JOINED.items():
+        sources = [select.format(schema=schema) for schema in schemas]
+        conn.execute(f"CREATE TEMP VIEW {view} AS {' UNION ALL '.join(sources)}")
+
     return conn
 
 
+def year_schema(year: int) -> str:
+    """Schema name holding the given year's weeks: an archive or main."""
+    return f"y{year}" if (YEARS_DIR / f"{year}.db").is_file() else "main"
+
+
 def init_db():
-    conn = get_db()
+    # Plain connection: journal_mode would otherwise be applied to the
+    # read-only archives as well.
+    conn = sqlite3.connect(DB_PATH)
 
     with open("schema.sql", "rb") as f:
         sql = f.read().decode("utf-8", errors="replace")
@@ -19,3 +84,83 @@ def init_db():
 
     conn.commit()
     conn.close()
+
+
+def archive_year(year: int, db_path=DB_PATH, years_dir=YEARS_DIR) -> dict:
+    """
+    Move a closed year's weeks, attendance and payroll out of the main
+    database into instance/years/<year>.db.
+
+    Rows keep their ids: AUTOINCREMENT never hands an id out twice, so the
+    archived weeks cannot collide with anything imported later. The archive
+    is vacuumed, switched out of WAL and made read-only, which lets readers
+    open it with immutable=1 and skip locking entirely.
+    """
+    if year >= datetime.date.today().year:
+        raise ValueError("Only past years can be archived")
+
+    years_dir = Path(years_dir)
+    years_dir.mkdir(parents=True, exist_ok=True)
+    target = years_dir / f"{year}.db"
+    if target.exists():
+        raise ValueError(f"Year {year} is already archived")
+
+    partial = years_dir / f".{year}.db.partial"
+    partial.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        ddl = conn.execute(
+            """
+            SELECT sql FROM sqlite_master
+            WHERE tbl_name IN (?, ?, ?) AND sql IS NOT NULL
+            ORDER BY type DESC
+            """,
+            tuple(PARTITIONED),
+        ).fetchall()
+
+        archive = sqlite3.connect(partial)
+        for row in ddl:
+            archive.execute(row["sql"])
+        archive.commit()
+        archive.close()
+
+        conn.execute("ATTACH DATABASE ? AS archive", (str(partial),))
+        with conn:
+            week_filter = "week_id IN (SELECT id FROM main.weeks WHERE year = ?)"
+            conn.execute("INSERT INTO archive.weeks SELECT * FROM main.weeks WHERE year = ?", (year,))
+            conn.execute(
+                f"INSERT INTO archive.attendance SELECT * FROM main.attendance WHERE {week_filter}",
+                (year,),
+            )
+            conn.execute(
+                f"INSERT INTO archive.payroll_reference SELECT * FROM main.payroll_reference WHERE {week_filter}",
+                (year,),
+            )
+            counts = {
+                table: conn.execute(f"SELECT COUNT(*) FROM archive.{table}").fetchone()[0]
+                for table in PARTITIONED
+            }
+            if not counts["weeks"]:
+                raise ValueError(f"No weeks found for {year}")
+
+            conn.execute(f"DELETE FROM main.attendance WHERE {week_filter}", (year,))
+            conn.execute(f"DELETE FROM main.payroll_reference WHERE {week_filter}", (year,))
+            conn.execute("DELETE FROM main.weeks WHERE year = ?", (year,))
+            conn.execute("DELETE FROM main.payload_cache WHERE key LIKE ?", (f"week:{year}:%",))
+        conn.execute("DETACH DATABASE archive")
+    except Exception:
+        conn.close()
+        partial.unlink(missing_ok=True)
+        raise
+    conn.close()
+
+    archive = sqlite3.connect(partial)
+    archive.execute("PRAGMA journal_mode = DELETE")
+    archive.execute("VACUUM")
+    archive.close()
+
+    os.chmod(partial, 0o444)
+    partial.replace(target)
+    return counts
@@ -0,0 +1,195 @@
+import datetime
+import fcntl
+import json
+import logging
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from core.db import DB_PATH, YEARS_DIR
+from core.week_history import compact_week_history
+from core.writer import write_lock
+
+BACKUP_DIR = Path("instance/backups")
+STATE_PATH = Path("instance/maintenance.json")
+DEFAULT_KEEP = 7
+
+log = logging.getLogger(__name__)
+
+
+def _timed(durations: dict, name: str, func):
+    start = time.monotonic()
+    result = func()
+    durations[name] = round(time.monotonic() - start, 3)
+    return result
+
+
+def _vacuum(conn) -> int:
+    """
+    Week overwrites delete and re-insert whole weeks, leaving free pages
+    behind. Incremental auto-vacuum returns them without rewriting the whole
+    file each time; older databases are switched over with one full VACUUM.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    freed = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    conn.execute("PRAGMA incremental_vacuum").fetchall()
+    return freed
+
+
+def _compact_history(conn) -> int:
+    with conn:
+        return compact_week_history(conn)
+
+
+def _backup(conn, backup_dir: Path, keep: int) -> str:
+    """
+    Connection.backup copies a consistent snapshot page by page while the
+    app keeps running. We write under a temporary name and rename, so a
+    crash never leaves a truncated file among the rotated backups.
+    """
+    if keep < 1:
+        raise ValueError("keep must be at least 1")
+
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    final = backup_dir / f"app-{stamp}.db"
+    partial = backup_dir / f".app-{stamp}.db.partial"
+
+    dest = sqlite3.connect(partial)
+    try:
+        conn.backup(dest, pages=256)
+    finally:
+        dest.close()
+    partial.replace(final)
+
+    backups = sorted(backup_dir.glob("app-*.db"))
+    for old in backups[:len(backups) - keep]:
+        old.unlink()
+    return str(final)
+
+
+def backup_archives(years_dir=YEARS_DIR, backup_dir=BACKUP_DIR) -> list[str]:
+    """
+    Archived years exist only in their instance/years file once they leave
+    app.db, so each gets a copy under backups/years/. The files never change
+    after archiving, so a copy is only made when it is missing or differs in
+    size. Rotation does not apply: each copy is the only one of that year.
+    """
+    target_dir = Path(backup_dir) / "years"
+    copied = []
+    for source in sorted(Path(years_dir).glob("*.db")):
+        target = target_dir / source.name
+        if target.exists() and target.stat().st_size == source.stat().st_size:
+            continue
+        target_dir.mkdir(parents=True, exist_ok=True)
+        partial = target_dir / f".{source.name}.partial"
+        shutil.copyfile(source, partial)
+        partial.replace(target)
+        copied.append(str(target))
+    return copied
+
+
+def run_maintenance(db_path=DB_PATH, backup_dir=BACKUP_DIR, keep=DEFAULT_KEEP) -> dict:
+    """
+    Checkpoint the WAL, compact the week history, reclaim free pages,
+    verify integrity and take a rotating online backup. A failed integrity check skips the backup so a
+    corrupt copy never pushes a good one out of the retention window.
+    """
+    durations = {}
+    start = time.monotonic()
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        checkpoint = _timed(
+            durations, "checkpoint",
+            lambda: conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone(),
+        )
+        compacted = _timed(durations, "compact_history", lambda: _compact_history(conn))
+        freed = _timed(durations, "vacuum", lambda: _vacuum(conn))
+        integrity = _timed(
+            durations, "integrity_check",
+            lambda: [r[0] for r in conn.execute("PRAGMA integrity_check")],
+        )
+
+        ok = integrity == ["ok"]
+        backup = None
+        archives = []
+        if ok:
+            backup = _timed(durations, "backup", lambda: _backup(conn, Path(backup_dir), keep))
+            archives = _timed(durations, "backup_archives", lambda: backup_archives(backup_dir=backup_dir))
+        else:
+            log.error("Integrity check failed, backup skipped: %s", integrity[:10])
+    finally:
+        conn.close()
+
+    durations["total"] = round(time.monotonic() - start, 3)
+    result = {
+        "finished_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "checkpoint_busy": bool(checkpoint[0]),
+        "compacted_versions": compacted,
+        "freed_pages": freed,
+        "integrity_ok": ok,
+        "integrity": integrity[:10],
+        "backup": backup,
+        "archive_backups": archives,
+        "durations": durations,
+    }
+    log.info("Maintenance finished in %.2fs: %s", durations["total"], durations)
+    return result
+
+
+def run_if_due(interval: datetime.timedelta, state_path=STATE_PATH, **kwargs) -> dict | None:
+    """
+    Each gunicorn worker runs its own scheduler thread. An exclusive lock on
+    the state file makes sure only one of them works at a time, and the last
+    run stored inside it keeps the others from repeating the job.
+    """
+    state_path = Path(state_path)
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(state_path, "a+") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return None
+
+        f.seek(0)
+        try:
+            last = json.loads(f.read() or "{}")
+        except ValueError:
+            last = {}
+
+        last_run = last.get("finished_at")
+        if last_run and datetime.datetime.now() - datetime.datetime.fromisoformat(last_run) < interval:
+            return None
+
+        # VACUUM and the checkpoint need the database to themselves
+        with write_lock("maintenance", timeout=300):
+            result = run_maintenance(**kwargs)
+        f.seek(0)
+        f.truncate()
+        json.dump(result, f)
+        return result
+
+
+def start_scheduler(app, interval: datetime.timedelta, keep=DEFAULT_KEEP) -> threading.Thread:
+    """Start a daemon thread that checks every few minutes whether maintenance is due."""
+    poll = min(interval.total_seconds(), 300)
+
+    def loop():
+        while True:
+            time.sleep(poll)
+            try:
+                result = run_if_due(interval, keep=keep)
+                if result:
+                    app.logger.info("Scheduled maintenance done: %s", result["durations"])
+            except Exception:
+                app.logger.exception("Scheduled maintenance failed")
+
+    thread = threading.Thread(target=loop, name="db-maintenance", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,230 @@
+import datetime
+import json
+
+# Every this many versions a week gets a full snapshot, so reads replay at
+# most SNAPSHOT_EVERY - 1 deltas
+SNAPSHOT_EVERY = 10
+
+PAYROLL_FIELDS = ("salario", "bonus", "total", "comment")
+
+
+def week_state(conn, year: int, kw: int) -> dict | None:
+    """
+    Current content of a week in the main database, or None if it does not
+    exist. Attendance is keyed "<worker>:<day>:<half>" -> site id and payroll
+    "<worker>" -> fields, so states diff and serialize as plain JSON.
+    """
+    week = conn.execute(
+        "SELECT id FROM weeks WHERE year=? AND week_number=?", (year, kw)
+    ).fetchone()
+    if not week:
+        return None
+
+    attendance = conn.execute(
+        "SELECT worker_id, day, half, code FROM attendance WHERE week_id=?",
+        (week[0],),
+    ).fetchall()
+    payroll = conn.execute(
+        "SELECT worker_id, salario, bonus, total, comment FROM payroll_reference WHERE week_id=?",
+        (week[0],),
+    ).fetchall()
+
+    return {
+        "attendance": {f"{w}:{d}:{h}": site for w, d, h, site in attendance},
+        "payroll": {str(r[0]): dict(zip(PAYROLL_FIELDS, r[1:])) for r in payroll},
+    }
+
+
+def _diff(before: dict, after: dict) -> dict:
+    """
+    Only changed cells and payroll fields are kept. None marks a removed
+    attendance cell or payroll row; a new payroll row carries all fields.
+    """
+    attendance = {k: v for k, v in after["attendance"].items() if before["attendance"].get(k) != v}
+    attendance.update({k: None for k in before["attendance"] if k not in after["attendance"]})
+
+    payroll = {}
+    for worker, fields in after["payroll"].items():
+        old = before["payroll"].get(worker)
+        if old is None:
+            payroll[worker] = fields
+            continue
+        changed = {f: v for f, v in fields.items() if old.get(f) != v}
+        if changed:
+            payroll[worker] = changed
+    payroll.update({w: None for w in before["payroll"] if w not in after["payroll"]})
+
+    return {"attendance": attendance, "payroll": payroll}
+
+
+def _apply(state: dict, delta: dict) -> dict:
+    for key, site in delta["attendance"].items():
+        if site is None:
+            state["attendance"].pop(key, None)
+        else:
+            state["attendance"][key] = site
+
+    for worker, fields in delta["payroll"].items():
+        if fields is None:
+            state["payroll"].pop(worker, None)
+        else:
+            state["payroll"].setdefault(worker, {}).update(fields)
+    return state
+
+
+def _insert(conn, year, kw, version, kind, data) -> None:
+    conn.execute(
+        """
+        INSERT INTO week_versions (year, week_number, version, kind, data)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (year, kw, version, kind, json.dumps(data, separators=(",", ":"))),
+    )
+
+
+def record_week_version(conn, year: int, kw: int, before: dict | None, after: dict) -> int:
+    """
+    Store the state an import just wrote as the week's next version, inside
+    the import's transaction. The first version is a full snapshot, later
+    ones are deltas against `before`, the content the import replaced.
+    Every SNAPSHOT_EVERY-th version after a snapshot is stored as a full
+    snapshot again. Returns the week's current version.
+
+    Weeks imported before history was kept have no versions yet; their
+    replaced content becomes version 1 so the first overwrite is not lost.
+    """
+    latest, last_snapshot = conn.execute(
+        """
+        SELECT MAX(version), MAX(CASE WHEN kind = 'snapshot' THEN version END)
+        FROM week_versions WHERE year=? AND week_number=?
+        """,
+        (year, kw),
+    ).fetchone()
+
+    if latest is None and before is not None:
+        _insert(conn, year, kw, 1, "snapshot", before)
+        latest = last_snapshot = 1
+
+    if latest is None:
+        _insert(conn, year, kw, 1, "snapshot", after)
+        return 1
+
+    delta = _diff(before or {"attendance": {}, "payroll": {}}, after)
+    if not delta["attendance"] and not delta["payroll"]:
+        # Re-importing the same file (upload, then confirm) adds no version
+        return latest
+
+    if latest + 1 - last_snapshot >= SNAPSHOT_EVERY:
+        _insert(conn, year, kw, latest + 1, "snapshot", after)
+    else:
+        _insert(conn, year, kw, latest + 1, "delta", delta)
+    return latest + 1
+
+
+def list_week_versions(db, year: int, kw: int) -> list[dict]:
+    rows = db.execute(
+        """
+        SELECT version, kind, created_at
+        FROM week_versions
+        WHERE year=? AND week_number=?
+        ORDER BY version
+        """,
+        (year, kw),
+    ).fetchall()
+    return [{"version": r[0], "kind": r[1], "created_at": r[2]} for r in rows]
+
+
+def resolve_version(db, year: int, kw: int, as_of) -> int:
+    """
+    `as_of` is a version number or an ISO date/time (UTC, like created_at).
+    A date alone means the end of that day.
+    """
+    if isinstance(as_of, int) or str(as_of).isdigit():
+        version = int(as_of)
+        row = db.execute(
+            "SELECT version FROM week_versions WHERE year=? AND week_number=? AND version=?",
+            (year, kw, version),
+        ).fetchone()
+        if not row:
+            raise ValueError(f"KW {kw} of {year} has no version {version}")
+        return version
+
+    try:
+        moment = datetime.datetime.fromisoformat(str(as_of))
+    except ValueError:
+        raise ValueError("as_of must be a version number or an ISO date/time")
+    if len(str(as_of)) == 10:
+        moment += datetime.timedelta(days=1, microseconds=-1)
+
+    row = db.execute(
+        """
+        SELECT MAX(version) FROM week_versions
+        WHERE year=? AND week_number=? AND created_at <= ?
+        """,
+        (year, kw, moment.strftime("%Y-%m-%d %H:%M:%S")),
+    ).fetchone()
+    if row[0] is None:
+        raise ValueError(f"KW {kw} of {year} has no version as of {as_of}")
+    return row[0]
+
+
+def week_state_at(db, year: int, kw: int, version: int) -> dict:
+    """
+    Rebuild a version from the nearest snapshot at or before it plus the
+    deltas in between.
+    """
+    rows = db.execute(
+        """
+        SELECT kind, data FROM week_versions
+        WHERE year=? AND week_number=? AND version <= ?
+          AND version >= (
+              SELECT MAX(version) FROM week_versions
+              WHERE year=? AND week_number=? AND version <= ? AND kind = 'snapshot'
+          )
+        ORDER BY version
+        """,
+        (year, kw, version, year, kw, version),
+    ).fetchall()
+
+    state = json.loads(rows[0][1])
+    for _, data in rows[1:]:
+        _apply(state, json.loads(data))
+    return state
+
+
+def compact_week_history(conn, every: int = SNAPSHOT_EVERY) -> int:
+    """
+    Turn every `every`-th delta of a chain into a full snapshot, so a
+    point-in-time read never replays more than `every` deltas. New versions
+    already get their snapshots from record_week_version; this catches
+    chains written before it did, or with a different `every`. Nothing is
+    lost: earlier versions still replay from the previous snapshot, and
+    later deltas apply on top of the new one. Returns the number of
+    versions rewritten.
+    """
+    weeks = conn.execute("SELECT DISTINCT year, week_number FROM week_versions").fetchall()
+    rewritten = 0
+    for year, kw in weeks:
+        state, chain = None, 0
+        rows = conn.execute(
+            """
+            SELECT id, kind, data FROM week_versions
+            WHERE year=? AND week_number=?
+            ORDER BY version
+            """,
+            (year, kw),
+        ).fetchall()
+        for version_id, kind, data in rows:
+            if kind == "snapshot":
+                state, chain = json.loads(data), 0
+                continue
+            _apply(state, json.loads(data))
+            chain += 1
+            if chain >= every:
+                conn.execute(
+                    "UPDATE week_versions SET kind='snapshot', data=? WHERE id=?",
+                    (json.dumps(state, separators=(",", ":")), version_id),
+                )
+                chain = 0
+                rewritten += 1
+    return rewritten
@@ -0,0 +1,115 @@
+import fcntl
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+LOCK_PATH = Path("instance/writer.lock")
+QUEUE_DIR = Path("instance/write-queue")
+
+# Gunicorn kills a sync worker after 30s, so a waiting request gives up first
+WRITE_TIMEOUT = 20.0
+BACKOFF_START = 0.05
+BACKOFF_MAX = 1.0
+STALE_TICKET_SECONDS = 600
+
+
+class WriterBusyError(RuntimeError):
+    pass
+
+
+_metrics_lock = threading.Lock()
+_metrics = {
+    "acquired": 0,
+    "timeouts": 0,
+    "retries": 0,
+    "total_wait": 0.0,
+    "max_wait": 0.0,
+}
+
+
+def _record(waited: float, retries: int, acquired: bool) -> None:
+    with _metrics_lock:
+        _metrics["retries"] += retries
+        if acquired:
+            _metrics["acquired"] += 1
+            _metrics["total_wait"] += waited
+            _metrics["max_wait"] = max(_metrics["max_wait"], waited)
+        else:
+            _metrics["timeouts"] += 1
+
+
+@contextmanager
+def write_lock(purpose: str, timeout: float = WRITE_TIMEOUT):
+    """
+    Serialize database writes across threads and gunicorn workers.
+
+    SQLite allows a single writer; two uploads racing each other used to end
+    in "database is locked" halfway through an import. Writers now queue on
+    an exclusive flock and retry with jittered exponential backoff until
+    `timeout`, then raise WriterBusyError instead of failing mid-write.
+
+    While waiting, each writer leaves a ticket in the spool directory, so the
+    queue depth is visible from every process.
+    """
+    QUEUE_DIR.mkdir(parents=True, exist_ok=True)
+    ticket = QUEUE_DIR / f"{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.{purpose}"
+    ticket.touch()
+
+    start = time.monotonic()
+    retries = 0
+    delay = BACKOFF_START
+    try:
+        with open(LOCK_PATH, "a") as f:
+            while True:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() - start + delay > timeout:
+                        _record(time.monotonic() - start, retries, acquired=False)
+                        raise WriterBusyError(
+                            "Another import or save is still running, please try again in a moment."
+                        )
+                    retries += 1
+                    time.sleep(delay * random.uniform(0.5, 1.5))
+                    delay = min(delay * 2, BACKOFF_MAX)
+
+            ticket.unlink(missing_ok=True)
+            _record(time.monotonic() - start, retries, acquired=True)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+    finally:
+        ticket.unlink(missing_ok=True)
+
+
+def writer_stats() -> dict:
+    """
+    Queue depth is shared through the spool directory; the counters are per
+    process, so each gunicorn worker reports its own.
+    """
+    waiting = []
+    now = time.time()
+    for ticket in QUEUE_DIR.glob("*-*"):
+        try:
+            age = now - ticket.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        if age > STALE_TICKET_SECONDS:
+            # Left behind by a killed worker
+            ticket.unlink(missing_ok=True)
+            continue
+        waiting.append({"purpose": ticket.suffix.lstrip("."), "waiting_for": round(age, 2)})
+
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    metrics["avg_wait"] = round(metrics["total_wait"] / metrics["acquired"], 4) if metrics["acquired"] else 0.0
+    metrics["total_wait"] = round(metrics["total_wait"], 4)
+    metrics["max_wait"] = round(metrics["max_wait"], 4)
+
+    return {"queue_depth": len(waiting), "waiting": waiting, "pid": os.getpid(), **metrics}
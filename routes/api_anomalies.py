@@ -0,0 +1,26 @@
+from flask import Blueprint, jsonify, request
+from core.auth import login_required
+from core.db import get_db
+from services.anomaly_service import detect_anomalies
+from services.attendance_service import parse_week_key
+
+api_anomalies_bp = Blueprint("api_anomalies", __name__, url_prefix="/api/anomalies")
+
+
+@api_anomalies_bp.route("")
+@login_required
+def anomalies():
+    """Payroll anomaly report for from=YYYY-Www[&to=YYYY-Www] across all workers."""
+    try:
+        start = parse_week_key(request.args["from"])
+        end = parse_week_key(request.args.get("to", request.args["from"]))
+    except KeyError:
+        return jsonify({"error": "Missing 'from' parameter"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    db = get_db()
+    flagged = detect_anomalies(db, start, end)
+    db.close()
+
+    return jsonify({"count": len(flagged), "anomalies": flagged})
@@ -0,0 +1,76 @@
+import json
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from core.auth import login_required
+from services.attendance_service import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    iter_attendance_range,
+    parse_week_key,
+)
+
+api_attendance_bp = Blueprint("api_attendance", __name__, url_prefix="/api/attendance")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# RANGE EXPORT (NDJSON)
+# ─────────────────────────────────────────────────────────────────────────────
+@api_attendance_bp.route("")
+@login_required
+def attendance_range():
+    """
+    Stream raw half-day records as newline-delimited JSON.
+
+    Query: from=YYYY-Www, to=YYYY-Www, optional site=<code>, worker=<id>,
+    limit=<n> and cursor=<token>. The last line is always
+    {"next_cursor": ...}; pass it back as `cursor` until it is null.
+    """
+    try:
+        start = parse_week_key(request.args["from"])
+        end = parse_week_key(request.args.get("to", request.args["from"]))
+        worker = request.args.get("worker") or None
+        if worker is not None and not worker.isdigit():
+            raise ValueError(f"Invalid worker '{worker}', expected a worker id")
+        worker_id = int(worker) if worker else None
+        limit = request.args.get("limit", str(DEFAULT_PAGE_SIZE))
+        if not limit.isdigit():
+            raise ValueError(f"Invalid limit '{limit}'")
+        limit = int(limit)
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        cursor = request.args.get("cursor")
+        after = decode_cursor(cursor) if cursor else None
+    except KeyError:
+        return jsonify({"error": "Missing 'from' parameter"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    rows = iter_attendance_range(
+        start,
+        end,
+        site_code=request.args.get("site") or None,
+        worker_id=worker_id,
+        after=after,
+        limit=limit,
+    )
+
+    def generate():
+        count = 0
+        last_key = None
+        for r in rows:
+            last_key = (r["year"], r["week_number"], r["worker_id"], r["day"], r["half"])
+            count += 1
+            yield json.dumps({
+                "year":      r["year"],
+                "week":      r["week_number"],
+                "worker_id": r["worker_id"],
+                "day":       r["day"],
+                "half":      r["half"],
+                "site":      r["site_code"],
+            }) + "\n"
+
+        next_cursor = encode_cursor(last_key) if count == limit else None
+        yield json.dumps({"next_cursor": next_cursor}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
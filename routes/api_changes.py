@@ -0,0 +1,24 @@
+from flask import Blueprint, jsonify, request
+from core.auth import login_required
+from core.changes import changes_since
+from core.db import get_db
+
+api_changes_bp = Blueprint("api_changes", __name__, url_prefix="/api/changes")
+
+
+@api_changes_bp.route("")
+@login_required
+def changes():
+    """
+    Workers, weeks and sites touched after revision since=<rev>. Clients keep
+    the returned `rev` for their next call and refetch only what is listed.
+    """
+    since = request.args.get("since", 0, type=int)
+    if since < 0:
+        return jsonify({"error": "'since' must be a revision number"}), 400
+
+    db = get_db()
+    result = changes_since(db, since)
+    db.close()
+
+    return jsonify(result)
@@ -0,0 +1,27 @@
+from flask import Blueprint, jsonify
+from core.auth import login_required
+from core.writer import writer_stats
+from services.post_import import get_job, list_jobs
+
+api_jobs_bp = Blueprint("api_jobs", __name__, url_prefix="/api/jobs")
+
+
+@api_jobs_bp.route("")
+@login_required
+def jobs():
+    return jsonify({"jobs": list_jobs()})
+
+
+@api_jobs_bp.route("/writer")
+@login_required
+def writer():
+    return jsonify(writer_stats())
+
+
+@api_jobs_bp.route("/<int:job_id>")
+@login_required
+def job(job_id):
+    job = get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
@@ -1,6 +1,8 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, url_for
 from core.db import get_db
 from core.auth import login_required
+from services.worker_service import build_worker_charts, build_worker_profile
+from services.snapshot_service import MANIFEST, snapshots_current
 
 dashboard_bp = Blueprint("dashboard", __name__)
 
@@ -19,8 +21,24 @@ def dashboard():
 
     selected_worker_id = workers[0]["id"] if workers else None
 
+    # Embed the first worker's payloads so the page paints without API calls
+    bootstrap = None
+    if selected_worker_id is not None:
+        bootstrap = {
+            "id":      selected_worker_id,
+            "profile": build_worker_profile(db, selected_worker_id),
+            "charts":  build_worker_charts(db, selected_worker_id),
+        }
+    use_snapshots = snapshots_current(db)
+    db.close()
+
     return render_template(
         "dashboard.html",
         workers=workers,
         selected_worker_id=selected_worker_id,
+        bootstrap=bootstrap,
+        snapshot_base=(
+            url_for("snapshots.snapshot", filename=MANIFEST).rsplit("/", 1)[0]
+            if use_snapshots else None
+        ),
     )
@@ -1,6 +1,10 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from core.db import get_db
 from core.auth import login_required
+from core.cache import invalidate_prefix
+from core.changes import record_changes
+from core.writer import WriterBusyError, write_lock
+from services.post_import import schedule_snapshot_refresh
 import sqlite3
 
 
@@ -14,48 +18,66 @@ def settings():
 
     if request.method == "POST":
         errors = []
-        with conn:  # transaction (prevents locking issues)
-            # ---- Workers: cedulas ----
-            for key, value in request.form.items():
-                if key.startswith("cedula_"):
-                    worker_id = int(key.split("_", 1)[1])
-                    cedula = value.strip() or None
-
-                    try:
-                        conn.execute(
-                            """
-                            UPDATE workers
-                            SET cedula = ?
-                            WHERE id = ? AND active = 1
-                            """,
-                            (cedula, worker_id),
-                        )
-                    except sqlite3.IntegrityError:
-                        errors.append(f"Duplicate cedula for worker {worker_id}")
-
-            # ---- Construction sites: names ----
-            for key, value in request.form.items():
-                if key.startswith("site_name_"):
-                    site_id = int(key.split("_", 2)[2])
-                    name = value.strip()
-
-                    try:
-                        conn.execute(
-                            """
-                            UPDATE construction_sites
-                            SET name = ?
-                            WHERE id = ? AND active = 1
-                            """,
-                            (name, site_id),
-                        )
-                    except sqlite3.IntegrityError:
-                        errors.append(f"Duplicate site name for site {site_id}")
-
-            # Flash errors if any
+        changed_workers, changed_sites = [], []
+        try:
+            with write_lock("settings"):
+                with conn:  # transaction (prevents locking issues)
+                    # ---- Workers: cedulas ----
+                    for key, value in request.form.items():
+                        if key.startswith("cedula_"):
+                            worker_id = int(key.split("_", 1)[1])
+                            cedula = value.strip() or None
+
+                            try:
+                                cur = conn.execute(
+                                    """
+                                    UPDATE workers
+                                    SET cedula = ?
+                                    WHERE id = ? AND active = 1 AND cedula IS NOT ?
+                                    """,
+                                    (cedula, worker_id, cedula),
+                                )
+                                if cur.rowcount:
+                                    changed_workers.append(worker_id)
+                            except sqlite3.IntegrityError:
+                                errors.append(f"Duplicate cedula for worker {worker_id}")
+
+                    # ---- Construction sites: names ----
+                    for key, value in request.form.items():
+                        if key.startswith("site_name_"):
+                            site_id = int(key.split("_", 2)[2])
+                            name = value.strip()
+
+                            try:
+                                cur = conn.execute(
+                                    """
+                                    UPDATE construction_sites
+                                    SET name = ?
+                                    WHERE id = ? AND active = 1 AND name IS NOT ?
+                                    """,
+                                    (name, site_id, name),
+                                )
+                                if cur.rowcount:
+                                    changed_sites.append(site_id)
+                            except sqlite3.IntegrityError:
+                                errors.append(f"Duplicate site name for site {site_id}")
+
+                    # ---- Site labels appear in cached charts and week grids ----
+                    if changed_sites:
+                        invalidate_prefix(conn, "charts:")
+                        invalidate_prefix(conn, "week:")
+
+                    record_changes(conn, "settings", workers=changed_workers, sites=changed_sites)
+        except WriterBusyError as e:
+            errors.append(str(e))
+
+        # Flash errors if any
         for err in errors:
             flash(err, "error")
 
         conn.close()
+        if changed_workers or changed_sites:
+            schedule_snapshot_refresh()
 
         return redirect(url_for("settings.settings"))
 
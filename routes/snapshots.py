@@ -0,0 +1,40 @@
+import os
+
+from flask import Blueprint, abort, current_app, make_response, request, send_file
+from werkzeug.security import safe_join
+
+from core.auth import login_required
+from services.snapshot_service import SNAPSHOT_DIR
+
+snapshots_bp = Blueprint("snapshots", __name__)
+
+
+@snapshots_bp.route("/snapshots/<path:filename>")
+@login_required
+def snapshot(filename):
+    """
+    Snapshot files hold payroll data, so they go through the login check.
+    With WUKOND_SNAPSHOT_ACCEL set, nginx sends the file itself from an
+    `internal` location once Flask has checked the session.
+    """
+    root = os.path.abspath(SNAPSHOT_DIR)
+    path = safe_join(root, filename)
+    if path is None or not filename.endswith(".json") or not os.path.isfile(path):
+        abort(404)
+
+    accel = current_app.config.get("SNAPSHOT_ACCEL")
+    if accel:
+        response = make_response("")
+        response.headers["X-Accel-Redirect"] = accel.rstrip("/") + "/" + filename
+        response.headers["Content-Type"] = "application/json"
+        return response
+
+    gzipped = path + ".gz"
+    if request.accept_encodings["gzip"] and os.path.isfile(gzipped):
+        response = send_file(gzipped, mimetype="application/json", conditional=True)
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = send_file(path, mimetype="application/json", conditional=True)
+    response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
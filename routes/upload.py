@@ -1,9 +1,33 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from services.upload_service import handle_upload, overwrite_existing_week
 from core.auth import login_required
+from core.writer import WriterBusyError
 
 upload_bp = Blueprint("upload", __name__)
 
+# Flashes live in the session cookie, so only the first few are listed
+MAX_FLASHED_ANOMALIES = 5
+
+
+def _flash_anomalies(anomalies):
+    if not anomalies:
+        return
+    flash(f"{len(anomalies)} payroll anomaly(ies) flagged, please double-check:", "warning")
+    for a in anomalies[:MAX_FLASHED_ANOMALIES]:
+        flash(f"KW {a['kw']} · {a['name']}: {a['detail']}", "warning")
+    if len(anomalies) > MAX_FLASHED_ANOMALIES:
+        flash(f"… and {len(anomalies) - MAX_FLASHED_ANOMALIES} more, see /api/anomalies.", "warning")
+
+
+def _flash_row_errors(errors):
+    if not errors:
+        return
+    flash(f"{len(errors)} CSV line(s) could not be read cleanly:", "warning")
+    for e in errors[:MAX_FLASHED_ANOMALIES]:
+        flash(f"Line {e['line']}: {e['message']}", "warning")
+    if len(errors) > MAX_FLASHED_ANOMALIES:
+        flash(f"… and {len(errors) - MAX_FLASHED_ANOMALIES} more.", "warning")
+
 
 @upload_bp.route("/upload", methods=["GET", "POST"])
 @login_required
@@ -15,18 +39,38 @@ def upload():
             return render_template("upload.html", error=result["message"])
 
         if result["status"] == "confirm":
+            _flash_row_errors(result["row_errors"])
             return render_template(
                 "confirm_overwrite.html",
                 kw=result["kw"],
                 year=result["year"],
                 file_name=result["file_path"],
+                anomalies=result["anomalies"],
             )
 
+        if result["status"] == "ok_multi":
+            for week in result["weeks"]:
+                flash(
+                    f"Week {week['kw']} of {week['year']}"
+                    f" {'overwritten' if week['existed'] else 'imported successfully'}"
+                    f" — {week['worker_count']} worker(s), {week['attendance_count']} attendance record(s).",
+                    "success",
+                )
+            _flash_anomalies([a for week in result["weeks"] for a in week["anomalies"]])
+            if result["skipped"]:
+                flash(f"Skipped sheet(s) without a week number: {', '.join(result['skipped'])}", "error")
+            if result["error"]:
+                flash(f"{result['error']}. Only the weeks listed above were imported.", "error")
+            last = result["weeks"][-1]
+            return redirect(url_for("weeks.view_week", year=last["year"], kw=last["kw"]))
+
         flash(
             f"Week {result['kw']} of {result['year']} imported successfully"
             f" — {result['worker_count']} worker(s), {result['attendance_count']} attendance record(s).",
             "success",
         )
+        _flash_row_errors(result["row_errors"])
+        _flash_anomalies(result["anomalies"])
         return redirect(url_for("weeks.view_week", year=result["year"], kw=result["kw"]))
 
     return render_template("upload.html")
@@ -35,10 +79,15 @@ def upload():
 @upload_bp.route("/overwrite-week", methods=["POST"])
 @login_required
 def overwrite_week():
-    year, kw, result = overwrite_existing_week(request)
+    try:
+        year, kw, result = overwrite_existing_week(request)
+    except WriterBusyError as e:
+        return render_template("upload.html", error=str(e))
     flash(
         f"Week {kw} of {year} overwritten"
         f" — {result['worker_count']} worker(s), {result['attendance_count']} attendance record(s).",
         "success",
     )
+    _flash_row_errors(result["row_errors"])
+    _flash_anomalies(result["anomalies"])
     return redirect(url_for("weeks.view_week", year=year, kw=kw))
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request
 from services.week_service import (
     get_week_overview_data,
     get_week_view_data,
@@ -22,5 +22,5 @@ def week_overview(year):
 def view_week(year, kw):
     return render_template(
         "week_view.html",
-        **get_week_view_data(year, kw),
+        **get_week_view_data(year, kw, as_of=request.args.get("as_of") or None),
     )
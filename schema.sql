@@ -1,4 +1,8 @@
 PRAGMA foreign_keys = ON;
+-- Both only take effect once: WAL is persistent, auto_vacuum applies to new files
+-- (core/maintenance.py converts existing ones).
+PRAGMA auto_vacuum = INCREMENTAL;
+PRAGMA journal_mode = WAL;
 
 CREATE TABLE IF NOT EXISTS workers (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -36,6 +40,10 @@ CREATE TABLE IF NOT EXISTS attendance (
     UNIQUE(worker_id, week_id, day, half)
 );
 
+-- Week-ordered access (week view, range export keyset pagination)
+CREATE INDEX IF NOT EXISTS idx_attendance_week
+    ON attendance(week_id, worker_id, day, half);
+
 CREATE TABLE IF NOT EXISTS payroll_reference (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     worker_id INTEGER NOT NULL,
@@ -48,3 +56,51 @@ CREATE TABLE IF NOT EXISTS payroll_reference (
     FOREIGN KEY(worker_id) REFERENCES workers(id),
     UNIQUE(worker_id, week_id)
 );
+
+-- Derived JSON payloads (worker stats/charts, week grids), see core/cache.py
+CREATE TABLE IF NOT EXISTS payload_cache (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS post_import_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    year INTEGER NOT NULL,
+    week_number INTEGER NOT NULL,
+    status TEXT NOT NULL,        -- queued, running, done, failed
+    step TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at TEXT
+);
+
+-- Change feed: one revision per import or settings save, see core/changes.py
+CREATE TABLE IF NOT EXISTS revisions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,        -- import, settings
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS change_log (
+    rev INTEGER NOT NULL,
+    entity TEXT NOT NULL,        -- worker, week, site
+    entity_key TEXT NOT NULL,    -- worker/site id, or "<year>-<kw>" for weeks
+
+    FOREIGN KEY(rev) REFERENCES revisions(id),
+    UNIQUE(rev, entity, entity_key)
+);
+
+-- Week history: a snapshot or a delta per import, see core/week_history.py.
+-- Keyed by (year, week) rather than week_id so it survives archive-year.
+CREATE TABLE IF NOT EXISTS week_versions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    year INTEGER NOT NULL,
+    week_number INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    kind TEXT NOT NULL,          -- snapshot, delta
+    data TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    UNIQUE(year, week_number, version)
+);
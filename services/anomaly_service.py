@@ -0,0 +1,134 @@
+import datetime
+from statistics import fmean, pstdev
+
+TOTAL_TOLERANCE = 0.01   # relative difference allowed between total and expected
+RATE_JUMP = 0.25         # relative salario change between consecutive weeks
+Z_THRESHOLD = 3.0
+MIN_HISTORY = 4          # prior weeks needed before z-scores mean anything
+HISTORY_WEEKS = 26
+
+
+def _weeks_before(week, n):
+    # Counted from the Monday of week 1 rather than fromisocalendar(), which
+    # rejects a KW 53 that the year does not have.
+    jan4 = datetime.date(week[0], 1, 4)
+    monday = jan4 - datetime.timedelta(days=jan4.weekday(), weeks=n - week[1] + 1)
+    year, kw, _ = monday.isocalendar()
+    return year, kw
+
+
+def _load_columns(db, start, end):
+    """
+    One query loads the payroll rows from HISTORY_WEEKS before `start` up to
+    `end` for the whole fleet, with the number of attended halves joined in.
+    The halves are counted per loaded row, so attendance outside the window
+    is never read. The checks then run over plain column lists instead of
+    issuing per-worker queries.
+    """
+    rows = db.execute(
+        """
+        SELECT
+            p.worker_id,
+            wk.display_name,
+            p.year,
+            p.week_number,
+            p.salario,
+            p.bonus,
+            p.total,
+            p.halves
+        FROM all_payroll_weeks p
+        JOIN workers wk ON wk.id = p.worker_id
+        WHERE (p.year, p.week_number) BETWEEN (?, ?) AND (?, ?)
+        ORDER BY p.worker_id, p.year, p.week_number
+        """,
+        (*_weeks_before(start, HISTORY_WEEKS), *end),
+    ).fetchall()
+
+    names = ("worker_id", "name", "year", "kw", "salario", "bonus", "total", "halves")
+    return {name: [r[i] for r in rows] for i, name in enumerate(names)}
+
+
+def _flag(cols, i, check, detail, value=None, expected=None):
+    return {
+        "worker_id": cols["worker_id"][i],
+        "name":      cols["name"][i],
+        "year":      cols["year"][i],
+        "kw":        cols["kw"][i],
+        "check":     check,
+        "detail":    detail,
+        "value":     value,
+        "expected":  expected,
+    }
+
+
+def detect_anomalies(db, start: tuple[int, int], end: tuple[int, int]) -> list[dict]:
+    """
+    Flag payroll rows in the (year, week) range that look like typing or
+    payment mistakes:
+
+    - total_mismatch: total differs from salario × halves / 2 + bonus
+      (weeks with halves only; the next check covers the rest)
+    - paid_without_attendance: a total was paid for a week with no halves
+    - total_outlier: total is more than 3σ from the worker's recent history
+    - rate_jump: salario changed by more than 25% since the previous week
+    """
+    cols = _load_columns(db, start, end)
+    n = len(cols["worker_id"])
+
+    expected = [
+        (s or 0) * h / 2 + (b or 0)
+        for s, h, b in zip(cols["salario"], cols["halves"], cols["bonus"])
+    ]
+    in_range = [start <= (y, k) for y, k in zip(cols["year"], cols["kw"])]
+
+    # Rows are sorted by worker then week, so a worker's history is the run
+    # of rows since their first one.
+    run_start = [0] * n
+    for i in range(1, n):
+        same = cols["worker_id"][i] == cols["worker_id"][i - 1]
+        run_start[i] = run_start[i - 1] if same else i
+
+    flagged = []
+    for i in range(n):
+        if not in_range[i]:
+            continue
+
+        total = cols["total"][i]
+        salario = cols["salario"][i]
+
+        if total is not None and salario is not None and cols["halves"][i]:
+            if abs(total - expected[i]) > max(1, TOTAL_TOLERANCE * expected[i]):
+                flagged.append(_flag(
+                    cols, i, "total_mismatch",
+                    f"Total {total:,} but salario × days + bonus = {expected[i]:,.0f}",
+                    total, expected[i],
+                ))
+
+        if cols["halves"][i] == 0 and (total or 0) > 0:
+            flagged.append(_flag(
+                cols, i, "paid_without_attendance",
+                f"Total {total:,} paid without any attendance",
+                total, 0,
+            ))
+
+        first = run_start[i]
+        history = [t for t in cols["total"][max(first, i - HISTORY_WEEKS):i] if t is not None]
+
+        if total is not None and len(history) >= MIN_HISTORY:
+            mean, sd = fmean(history), pstdev(history)
+            if sd > 0 and abs(total - mean) / sd > Z_THRESHOLD:
+                flagged.append(_flag(
+                    cols, i, "total_outlier",
+                    f"Total {total:,} vs. usual {mean:,.0f} (z = {(total - mean) / sd:+.1f})",
+                    total, round(mean),
+                ))
+
+        previous = cols["salario"][i - 1] if i > first else None
+        if salario and previous and abs(salario - previous) / previous > RATE_JUMP:
+            flagged.append(_flag(
+                cols, i, "rate_jump",
+                f"Salario changed from {previous:,} to {salario:,}",
+                salario, previous,
+            ))
+
+    return flagged
@@ -0,0 +1,104 @@
+import base64
+import json
+import re
+
+from core.db import get_db
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 5000
+FETCH_CHUNK = 200
+
+_WEEK_RE = re.compile(r"^(\d{4})-W?(\d{1,2})$", re.IGNORECASE)
+
+
+def parse_week_key(value: str) -> tuple[int, int]:
+    """
+    Week bounds use the same "YYYY-Www" labels as the dashboard charts,
+    so scripts can feed labels they already have straight back in.
+    """
+    match = _WEEK_RE.match(value.strip())
+    if not match:
+        raise ValueError(f"Invalid week '{value}', expected YYYY-Www")
+
+    year, kw = int(match.group(1)), int(match.group(2))
+    if not 1 <= kw <= 53:
+        raise ValueError(f"Invalid week number in '{value}'")
+    return year, kw
+
+
+def encode_cursor(key: tuple) -> str:
+    """
+    The cursor is the sort key of the last emitted record. It is opaque to
+    clients but stateless on our side, so any gunicorn worker can resume it.
+    """
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[int, int, int, int, int]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded))
+        if len(key) != 5 or not all(isinstance(k, int) for k in key):
+            raise ValueError
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    return tuple(key)
+
+
+def iter_attendance_range(
+    start: tuple[int, int],
+    end: tuple[int, int],
+    site_code: str | None = None,
+    worker_id: int | None = None,
+    after: tuple | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
+    """
+    Yield half-day attendance records between two (year, week) bounds in
+    (year, week, worker, day, half) order, starting after the `after` key.
+
+    Rows are pulled from the cursor in small chunks so a page is never
+    materialized as a whole; the page size bounds how long one request runs.
+    """
+    where = ["(a.year, a.week_number) BETWEEN (?, ?) AND (?, ?)"]
+    params = [*start, *end]
+
+    if site_code:
+        where.append("cs.code = ?")
+        params.append(site_code)
+    if worker_id is not None:
+        where.append("a.worker_id = ?")
+        params.append(worker_id)
+    if after:
+        where.append(
+            "(a.year, a.week_number, a.worker_id, a.day, a.half) > (?, ?, ?, ?, ?)"
+        )
+        params.extend(after)
+
+    conn = get_db()
+    try:
+        cur = conn.execute(
+            f"""
+            SELECT
+                a.year,
+                a.week_number,
+                a.worker_id,
+                a.day,
+                a.half,
+                cs.code AS site_code
+            FROM all_attendance_weeks a
+            LEFT JOIN construction_sites cs ON cs.id = a.code
+            WHERE {" AND ".join(where)}
+            ORDER BY a.year, a.week_number, a.worker_id, a.day, a.half
+            LIMIT ?
+            """,
+            params + [limit],
+        )
+        while True:
+            chunk = cur.fetchmany(FETCH_CHUNK)
+            if not chunk:
+                break
+            yield from chunk
+    finally:
+        conn.close()
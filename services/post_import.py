@@ -0,0 +1,139 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from core.db import DB_PATH, get_db
+from core.writer import write_lock
+from services.worker_service import build_worker_charts, build_worker_profile
+from services.snapshot_service import refresh_snapshots_if_enabled
+from services.week_service import get_week_view_data
+
+# One thread per process: jobs only touch SQLite, so running them in
+# parallel would just contend for the same write lock.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="post-import")
+
+JOB_HISTORY = 100
+
+
+def schedule_post_import(year: int, kw: int) -> int:
+    """
+    Queue the follow-up work for a committed import and return its job id.
+    The upload request returns right away; progress lives in the
+    post_import_jobs table so any gunicorn worker can report it.
+    """
+    conn = get_db()
+    with conn:
+        cur = conn.execute(
+            "INSERT INTO post_import_jobs (year, week_number, status) VALUES (?, ?, 'queued')",
+            (year, kw),
+        )
+        job_id = cur.lastrowid
+        conn.execute("DELETE FROM post_import_jobs WHERE id <= ?", (job_id - JOB_HISTORY,))
+    conn.close()
+
+    app = current_app._get_current_object()
+    _executor.submit(_run_job, app, job_id, year, kw)
+    return job_id
+
+
+def schedule_snapshot_refresh() -> None:
+    """
+    Settings saves change payloads too. A full rebuild can outlast gunicorn's
+    timeout on the Pi, so it runs on the same thread as the import jobs.
+    """
+    if not current_app.config.get("AUTO_SNAPSHOTS"):
+        return
+    app = current_app._get_current_object()
+    _executor.submit(_run_snapshot_refresh, app)
+
+
+def _run_snapshot_refresh(app):
+    with app.app_context():
+        refresh_snapshots_if_enabled()
+
+
+def _set_status(job_id, status, step=None, error=None):
+    conn = get_db()
+    with conn:
+        conn.execute(
+            """
+            UPDATE post_import_jobs
+            SET status = ?, step = ?, error = ?,
+                finished_at = CASE WHEN ? IN ('done', 'failed') THEN CURRENT_TIMESTAMP END
+            WHERE id = ?
+            """,
+            (status, step, error, status, job_id),
+        )
+    conn.close()
+
+
+def _run_job(app, job_id, year, kw):
+    with app.app_context():
+        step = None
+        try:
+            for step, func in (
+                ("analyze", _refresh_statistics),
+                ("warm_workers", lambda: _warm_workers(year, kw)),
+                ("warm_week", lambda: get_week_view_data(year, kw)),
+                ("snapshots", refresh_snapshots_if_enabled),
+            ):
+                _set_status(job_id, "running", step)
+                func()
+        except Exception as e:
+            app.logger.exception("Post-import job %s failed at %s", job_id, step)
+            _set_status(job_id, "failed", step, str(e))
+        else:
+            _set_status(job_id, "done")
+
+
+def _refresh_statistics():
+    """
+    Imports change table sizes a lot, and the planner never sees that unless
+    statistics are refreshed. analysis_limit keeps ANALYZE cheap on the Pi.
+    Plain connection: the archives get_db() attaches are read-only, and
+    ANALYZE would try to write their statistics too.
+    """
+    with write_lock("analyze"):
+        conn = sqlite3.connect(DB_PATH)
+        conn.execute("PRAGMA analysis_limit = 400")
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA optimize")
+        conn.commit()
+        conn.close()
+
+
+def _warm_workers(year, kw):
+    """Recompute the cached stats and charts for everyone in the imported week."""
+    db = get_db()
+    rows = db.execute(
+        """
+        SELECT worker_id FROM all_attendance_weeks
+        WHERE year = ? AND week_number = ?
+        UNION
+        SELECT worker_id FROM all_payroll_weeks
+        WHERE year = ? AND week_number = ?
+        """,
+        (year, kw, year, kw),
+    ).fetchall()
+
+    for r in rows:
+        build_worker_profile(db, r["worker_id"])
+        build_worker_charts(db, r["worker_id"])
+    db.close()
+
+
+def get_job(job_id: int):
+    conn = get_db()
+    row = conn.execute("SELECT * FROM post_import_jobs WHERE id = ?", (job_id,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def list_jobs(limit: int = 20):
+    conn = get_db()
+    rows = conn.execute(
+        "SELECT * FROM post_import_jobs ORDER BY id DESC LIMIT ?", (limit,)
+    ).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
@@ -0,0 +1,132 @@
+import fcntl
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from flask import current_app
+
+from core.changes import latest_revision
+from core.db import get_db
+from services.worker_service import build_worker_charts, build_worker_profile
+from services.week_service import get_week_view_data
+
+# Payloads hold cédulas and payroll, so they live outside static/ and are
+# only served through the login-protected routes/snapshots.py
+SNAPSHOT_DIR = Path("instance/snapshots")
+MANIFEST = "manifest.json"
+
+
+def snapshots_current(db, out_dir=SNAPSHOT_DIR) -> bool:
+    """
+    A snapshot is only used while no import or settings save has happened
+    since it was built; otherwise the dashboard reads the live API.
+    """
+    try:
+        manifest = json.loads((Path(out_dir) / MANIFEST).read_bytes())
+    except (OSError, ValueError):
+        return False
+    return manifest.get("rev") == latest_revision(db)
+
+
+def _manifest_rev(out_dir) -> int:
+    try:
+        return json.loads((Path(out_dir) / MANIFEST).read_bytes()).get("rev", -1)
+    except (OSError, ValueError):
+        return -1
+
+
+def remove_legacy_snapshots(static_folder) -> None:
+    """Older versions wrote snapshots under static/, readable without login."""
+    shutil.rmtree(Path(static_folder) / "snapshots", ignore_errors=True)
+
+
+def _write_json(path: Path, payload) -> None:
+    """
+    Each payload gets a gzip sibling so nginx can answer with `gzip_static`
+    without compressing on the Pi. mtime=0 keeps rebuilds byte-identical.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    path.write_bytes(data)
+    Path(f"{path}.gz").write_bytes(gzip.compress(data, mtime=0))
+
+
+def build_snapshots(out_dir=SNAPSHOT_DIR) -> dict:
+    """
+    Dashboard and week payloads only change when data is imported or edited,
+    so we render all of them up front into files.
+
+    The tree is written into a temporary sibling directory and swapped in by
+    rename, so readers never see a half-written snapshot. During the swap the
+    directory is briefly missing; the dashboard then falls back to the API.
+    Swaps from different processes take turns on a lock file, and a build
+    that finishes after a newer one is discarded.
+    """
+    out_dir = Path(out_dir)
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=out_dir.parent, prefix=f".{out_dir.name}-"))
+
+    db = get_db()
+    try:
+        # Read first: a write landing mid-build leaves the snapshot marked stale
+        rev = latest_revision(db)
+        worker_ids = [r["id"] for r in db.execute("SELECT id FROM workers ORDER BY id")]
+        for worker_id in worker_ids:
+            base = tmp_dir / "workers" / str(worker_id)
+            _write_json(base / "profile.json", build_worker_profile(db, worker_id))
+            _write_json(base / "charts.json", build_worker_charts(db, worker_id))
+
+        weeks = db.execute(
+            "SELECT year, week_number FROM all_weeks ORDER BY year, week_number"
+        ).fetchall()
+        for w in weeks:
+            view = get_week_view_data(w["year"], w["week_number"])
+            _write_json(
+                tmp_dir / "weeks" / str(w["year"]) / f"{w['week_number']}.json",
+                {"year": view["year"], "kw": view["kw"], "workers": list(view["workers"])},
+            )
+
+        summary = {"workers": len(worker_ids), "weeks": len(weeks), "rev": rev}
+        _write_json(tmp_dir / MANIFEST, summary)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    finally:
+        db.close()
+
+    # Readable by nginx when it serves the files via X-Accel-Redirect
+    os.chmod(tmp_dir, 0o755)
+    old_dir, swapped = None, False
+    try:
+        with open(out_dir.parent / f".{out_dir.name}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if _manifest_rev(out_dir) <= rev:
+                if out_dir.exists():
+                    old_dir = Path(tempfile.mkdtemp(dir=out_dir.parent, prefix=f".{out_dir.name}-old-"))
+                    os.replace(out_dir, old_dir / out_dir.name)
+                os.replace(tmp_dir, out_dir)
+                swapped = True
+    finally:
+        # Otherwise a full copy of the payroll stays behind under instance/
+        if not swapped:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+    return summary
+
+
+def refresh_snapshots_if_enabled() -> None:
+    """
+    Called after imports and settings saves. A failed rebuild must not fail
+    the write that triggered it: the old snapshot stays and the API still works.
+    """
+    if not current_app.config.get("AUTO_SNAPSHOTS"):
+        return
+    try:
+        build_snapshots()
+    except Exception:
+        current_app.logger.exception("Snapshot rebuild failed")
@@ -1,8 +1,14 @@
 import csv
 import datetime
 import os
-from io import BytesIO
-from core.csv_import import import_csv
+import shutil
+import tempfile
+from werkzeug.utils import secure_filename
+from core.csv_import import CHUNK_SIZE, import_csv, import_rows, read_csv, read_xlsx_sheets
+from core.db import get_db
+from core.writer import write_lock
+from services.anomaly_service import detect_anomalies
+from services.post_import import schedule_post_import
 
 UPLOAD_DIR = "uploads"
 
@@ -20,46 +26,67 @@ def _count_csv_workers(rows):
     return count
 
 
+def _week_anomalies(year, kw):
+    db = get_db()
+    try:
+        return detect_anomalies(db, (year, kw), (year, kw))
+    finally:
+        db.close()
+
+
 def handle_upload(request):
     file = request.files.get("file")
     if not file or not file.filename:
         return {"status": "error", "message": "No file uploaded."}
 
+    if file.filename.lower().endswith(".xlsx"):
+        return handle_xlsx_upload(file)
+
+    year = datetime.date.today().year
+    os.makedirs(f"{UPLOAD_DIR}/{year}", exist_ok=True)
+
+    # Spool the upload to disk in chunks; only the first row is parsed here
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, suffix=".csv")
     try:
-        raw = file.read()
-        text = raw.decode("utf-8", errors="replace")
-        rows = list(csv.reader(text.splitlines(), delimiter=";"))
+        with os.fdopen(fd, "wb") as f:
+            shutil.copyfileobj(file.stream, f, CHUNK_SIZE)
+        with open(tmp_path, "rb") as f:
+            first = next(read_csv(f), None)
 
-        if not rows or len(rows[0]) < 2:
+        if not first or len(first) < 2:
             raise ValueError("CSV file is empty or malformed")
 
-        kw = int(rows[0][1])
-        year = datetime.date.today().year
+        kw = int(first[1])
     except Exception as e:
+        os.remove(tmp_path)
         return {"status": "error", "message": f"CSV read error: {e}"}
 
-    os.makedirs(f"{UPLOAD_DIR}/{year}", exist_ok=True)
-
     backup_path = f"{UPLOAD_DIR}/{year}/{kw}.csv"
     archive_path = f"{UPLOAD_DIR}/week_{year}_{kw}.csv"
 
-    for path in (backup_path, archive_path):
-        with open(path, "wb") as f:
-            f.write(raw)
+    os.replace(tmp_path, backup_path)
+    shutil.copyfile(backup_path, archive_path)
 
+    row_errors = []
     try:
-        kw, year, exists, worker_count, attendance_count = import_csv(
-            BytesIO(raw), db_path="instance/app.db"
-        )
+        with open(archive_path, "rb") as f, write_lock("import"):
+            kw, year, exists, worker_count, attendance_count = import_csv(
+                f, db_path="instance/app.db", errors=row_errors
+            )
     except Exception as e:
         return {"status": "error", "message": f"Import failed: {e}"}
 
+    job_id = schedule_post_import(year, kw)
+    anomalies = _week_anomalies(year, kw)
+
     if exists:
         return {
             "status": "confirm",
             "kw": kw,
             "year": year,
             "file_path": archive_path,
+            "anomalies": anomalies,
+            "row_errors": row_errors,
         }
 
     return {
@@ -68,6 +95,9 @@ def handle_upload(request):
         "kw": kw,
         "worker_count": worker_count,
         "attendance_count": attendance_count,
+        "job_id": job_id,
+        "anomalies": anomalies,
+        "row_errors": row_errors,
     }
 
 
@@ -76,7 +106,91 @@ def overwrite_existing_week(request):
     year = int(request.form["year"])
 
     path = f"{UPLOAD_DIR}/week_{year}_{kw}.csv"
-    with open(path, "rb") as f:
-        _, _, _, worker_count, attendance_count = import_csv(f, db_path="instance/app.db")
+    row_errors = []
+    with open(path, "rb") as f, write_lock("import"):
+        _, _, _, worker_count, attendance_count = import_csv(
+            f, db_path="instance/app.db", errors=row_errors
+        )
+
+    schedule_post_import(year, kw)
+
+    return year, kw, {
+        "worker_count": worker_count,
+        "attendance_count": attendance_count,
+        "anomalies": _week_anomalies(year, kw),
+        "row_errors": row_errors,
+    }
+
+
+def _import_sheet(rows):
+    """
+    Import one worksheet while writing its rows out as a ';' CSV, so the
+    week ends up in the same backup/archive files as a CSV upload and the
+    overwrite flow can re-import it from there.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, suffix=".csv")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, delimiter=";")
+
+            def tee():
+                for row in rows:
+                    writer.writerow(row)
+                    yield row
+
+            with write_lock("import"):
+                result = import_rows(tee(), db_path="instance/app.db")
+
+        kw, year = result[0], result[1]
+        os.makedirs(f"{UPLOAD_DIR}/{year}", exist_ok=True)
+        shutil.copyfile(tmp_path, f"{UPLOAD_DIR}/{year}/{kw}.csv")
+        shutil.copyfile(tmp_path, f"{UPLOAD_DIR}/week_{year}_{kw}.csv")
+    finally:
+        os.remove(tmp_path)
+
+    return result
+
+
+def handle_xlsx_upload(file):
+    """
+    A workbook holds one week per worksheet. Every sheet with a week number
+    in its first row is imported; other sheets (notes, totals) are skipped.
+    """
+    year = datetime.date.today().year
+    os.makedirs(f"{UPLOAD_DIR}/{year}", exist_ok=True)
+
+    name = secure_filename(file.filename) or "upload.xlsx"
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    workbook_path = f"{UPLOAD_DIR}/{year}/{stamp}_{name}"
+    file.save(workbook_path)
+
+    weeks = []
+    skipped = []
+    error = None
+    try:
+        for title, rows in read_xlsx_sheets(workbook_path):
+            try:
+                kw, year, exists, worker_count, attendance_count = _import_sheet(rows)
+            except ValueError:
+                skipped.append(title)
+                continue
+            weeks.append({
+                "kw": kw,
+                "year": year,
+                "existed": exists,
+                "worker_count": worker_count,
+                "attendance_count": attendance_count,
+                "job_id": schedule_post_import(year, kw),
+                "anomalies": _week_anomalies(year, kw),
+            })
+    except Exception as e:
+        # Sheets before the failing one are committed and already have
+        # post-import jobs, so they are still reported
+        error = f"Import failed: {e}"
+        if not weeks:
+            return {"status": "error", "message": error}
+
+    if not weeks:
+        return {"status": "error", "message": "No worksheet with a week number was found."}
 
-    return year, kw, {"worker_count": worker_count, "attendance_count": attendance_count}
+    return {"status": "ok_multi", "weeks": weeks, "skipped": skipped, "error": error}
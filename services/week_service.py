@@ -1,5 +1,7 @@
-from core.db import get_db
+from core.cache import get_cached
+from core.db import get_db, year_schema
 from core.helpers import get_existing_years, get_existing_kws_for_year
+from core.week_history import list_week_versions, resolve_version, week_state_at
 
 DAY_NAMES = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado"]
 
@@ -14,57 +16,107 @@ def get_week_overview_data(year):
     }
 
 
-def get_week_view_data(year, kw):
+def get_week_view_data(year, kw, as_of=None):
+    """
+    The week as it is now, or as_of an earlier version (a version number or
+    an ISO date/time), rebuilt from the week history.
+    """
     conn = get_db()
+    schema = year_schema(year)
 
     # ---- Get week id ----
     week = conn.execute(
-        "SELECT id FROM weeks WHERE year=? AND week_number=?",
+        f"SELECT id FROM {schema}.weeks WHERE year=? AND week_number=?",
         (year, kw),
     ).fetchone()
 
     if not week:
         raise ValueError("Week not found")
 
-    week_id = week["id"]
+    if as_of is None:
+        version = None
+        workers = get_cached(
+            conn, f"week:{year}:{kw}", lambda: _build_week_workers(conn, schema, week["id"])
+        )
+    else:
+        # Past versions are rebuilt on demand and never cached
+        version = resolve_version(conn, year, kw, as_of)
+        workers = _build_week_workers_at(conn, year, kw, version)
 
-    # ---- Fetch workers (CSV order assumed by ID) ----
-    workers_db = conn.execute(
-        "SELECT id, display_name FROM workers ORDER BY id"
-    ).fetchall()
+    return {
+        "year": year,
+        "kw": kw,
+        "workers": [_with_int_keys(w) for w in workers],
+        "day_names": DAY_NAMES,
+        "versions": list_week_versions(conn, year, kw),
+        "as_of": version,
+    }
 
-    # ---- Fetch attendance with construction site info ----
+
+def _with_int_keys(worker):
+    """
+    The cached grid round-trips through JSON, which turns the day/half keys
+    into strings; the template looks them up as integers.
+    """
+    worker["attendance"] = {
+        int(day): {int(half): v for half, v in halves.items()}
+        for day, halves in worker["attendance"].items()
+    }
+    return worker
+
+
+def _build_week_workers(conn, schema, week_id):
     attendance_db = conn.execute(
-        """
-        SELECT
-            a.worker_id,
-            a.day,
-            a.half,
-            a.code AS site_id,
-            cs.code AS site_code,
-            cs.name AS site_name
-        FROM attendance a
-        LEFT JOIN construction_sites cs ON a.code = cs.id
-        WHERE a.week_id=?
+        f"""
+        SELECT worker_id, day, half, code AS site_id
+        FROM {schema}.attendance
+        WHERE week_id=?
         """,
         (week_id,),
     ).fetchall()
 
-    # ---- Fetch payroll ----
     payroll_db = conn.execute(
-        """
+        f"""
         SELECT
             worker_id,
             salario,
             bonus,
             total,
             comment
-        FROM payroll_reference
+        FROM {schema}.payroll_reference
         WHERE week_id=?
         """,
         (week_id,),
     ).fetchall()
 
+    return _assemble_week(conn, attendance_db, payroll_db)
+
+
+def _build_week_workers_at(conn, year, kw, version):
+    state = week_state_at(conn, year, kw, version)
+
+    attendance = []
+    for key, site_id in state["attendance"].items():
+        worker_id, day, half = map(int, key.split(":"))
+        attendance.append({"worker_id": worker_id, "day": day, "half": half, "site_id": site_id})
+
+    payroll = [{"worker_id": int(w), **fields} for w, fields in state["payroll"].items()]
+
+    return _assemble_week(conn, attendance, payroll)
+
+
+def _assemble_week(conn, attendance_db, payroll_db):
+    # ---- Fetch workers (CSV order assumed by ID) ----
+    workers_db = conn.execute(
+        "SELECT id, display_name FROM workers ORDER BY id"
+    ).fetchall()
+
+    # ---- Construction site info for the display labels ----
+    sites = {
+        s["id"]: s
+        for s in conn.execute("SELECT id, code, name FROM main.construction_sites")
+    }
+
     # ---- Build base data structure ----
     data = {}
     for w in workers_db:
@@ -88,15 +140,16 @@ def get_week_view_data(year, kw):
 
         worker_att = data[wid]["attendance"]
         worker_att.setdefault(day, {})
+        site = sites.get(a["site_id"])
 
         # Display priority:
         # 1) site name
         # 2) site code (upper)
         # 3) numeric site id
-        if a["site_name"]:
-            display = a["site_name"]
-        elif a["site_code"]:
-            display = a["site_code"].upper()
+        if site and site["name"]:
+            display = site["name"]
+        elif site and site["code"]:
+            display = site["code"].upper()
         else:
             display = str(a["site_id"]) if a["site_id"] else ""
 
@@ -113,9 +166,4 @@ def get_week_view_data(year, kw):
         data[wid]["total"] = str(p["total"]) if p["total"] is not None else ""
         data[wid]["comment"] = p["comment"] or ""
 
-    return {
-        "year": year,
-        "kw": kw,
-        "workers": data.values(),
-        "day_names": DAY_NAMES,
-    }
+    return list(data.values())
@@ -25,19 +25,69 @@ function fmtNum(n) {
     return Number(n).toLocaleString();
 }
 
+// ─── Fetch a payload: static snapshot first, live API as fallback ────────────
+function fetchPayload(snapshotPath, apiPath) {
+    const live = () => fetch(apiPath).then(r => r.json());
+    if (!SNAPSHOT_BASE) return live();
+
+    return fetch(`${SNAPSHOT_BASE}/${snapshotPath}`)
+        .then(r => r.ok ? r.json() : Promise.reject(r.status))
+        .catch(live);
+}
+
+// ─── Worker payload LRU (profile + charts per worker) ────────────────────────
+const PAYLOAD_CACHE_SIZE = 20;
+const payloadCache = new Map();   // worker id -> Promise<[profile, charts]>
+let currentWorkerId = null;
+
+function getWorkerPayload(id) {
+    id = String(id);
+    if (payloadCache.has(id)) {
+        // Re-insert to mark as most recently used
+        const hit = payloadCache.get(id);
+        payloadCache.delete(id);
+        payloadCache.set(id, hit);
+        return hit;
+    }
+
+    const pending = Promise.all([
+        fetchPayload(`workers/${id}/profile.json`, `/api/worker/${id}/profile`),
+        fetchPayload(`workers/${id}/charts.json`,  `/api/worker/${id}/charts`),
+    ]).catch(err => {
+        payloadCache.delete(id);
+        throw err;
+    });
+
+    payloadCache.set(id, pending);
+    if (payloadCache.size > PAYLOAD_CACHE_SIZE) {
+        payloadCache.delete(payloadCache.keys().next().value);
+    }
+    return pending;
+}
+
+// Server-rendered payload for the initially selected worker
+function seedWorker(bootstrap) {
+    if (!bootstrap || !bootstrap.profile) return;
+    payloadCache.set(String(bootstrap.id), Promise.resolve([bootstrap.profile, bootstrap.charts]));
+}
+
+function prefetchWorker(id) {
+    if (id) getWorkerPayload(id).catch(() => {});
+}
+
 // ─── Load a worker ────────────────────────────────────────────────────────────
 function loadWorker(id) {
     if (!id) return;
+    currentWorkerId = String(id);
 
     // highlight sidebar
     document.querySelectorAll(".worker").forEach(el => {
         el.classList.toggle("selected", el.dataset.workerId == id);
     });
 
-    Promise.all([
-        fetch(`/api/worker/${id}/profile`).then(r => r.json()),
-        fetch(`/api/worker/${id}/charts`).then(r => r.json()),
-    ]).then(([profile, charts]) => {
+    getWorkerPayload(id).then(([profile, charts]) => {
+        // A slower response must not overwrite a worker clicked later
+        if (currentWorkerId !== String(id)) return;
         renderProfile(profile);
         drawCharts(charts);
     }).catch(err => console.error("Failed to load worker:", err));
@@ -206,9 +256,15 @@ function drawCharts(data) {
     });
 }
 
-// ─── Sidebar click listeners ──────────────────────────────────────────────────
+// ─── Sidebar listeners ───────────────────────────────────────────────────────
 document.addEventListener("DOMContentLoaded", () => {
     document.querySelectorAll(".worker").forEach(el => {
         el.addEventListener("click", () => loadWorker(el.dataset.workerId));
+        el.addEventListener("keydown", e => {
+            if (e.key === "Enter") loadWorker(el.dataset.workerId);
+        });
+        // Start fetching as soon as the user points at or tabs to a worker
+        el.addEventListener("mouseenter", () => prefetchWorker(el.dataset.workerId));
+        el.addEventListener("focus",      () => prefetchWorker(el.dataset.workerId));
     });
 });
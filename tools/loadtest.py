@@ -0,0 +1,349 @@
+"""
+Concurrent load test for the dashboard, worker APIs, week views and uploads.
+
+By default it builds a synthetic database in a temporary directory, starts
+the app there (Gunicorn if installed, otherwise the Werkzeug server), logs
+in every client through the normal /login form and replays a weighted mix
+of requests. Point it at a running instance with --url instead. Against
+--url the mix is read-only: uploads would overwrite a real week and add
+synthetic workers, so they are only sent with --allow-writes.
+
+    python tools/loadtest.py --clients 8 --duration 60 --gunicorn-workers 2
+    python tools/loadtest.py --url http://wukong.db --user admin --password ...
+"""
+import argparse
+import http.cookiejar
+import os
+import random
+import re
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+from io import BytesIO
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from core.csv_import import DAYS, import_csv  # noqa: E402
+
+SCENARIOS = {
+    "dashboard": 3,
+    "worker": 6,
+    "week_view": 3,
+    "upload": 1,
+}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SYNTHETIC DATA
+# ─────────────────────────────────────────────────────────────────────────────
+def make_week_csv(kw: int, worker_count: int, rng: random.Random) -> bytes:
+    """Build a week in the same layout as the Excel export."""
+    sites = [f"S{i}" for i in range(1, 9)]
+    header = ["Nombre"]
+    for day in DAYS:
+        header += [f"{day} am", f"{day} pm"]
+    header += ["salario", "bonus", "total", "comentario"]
+
+    lines = [f"KW;{kw}", ";".join(header)]
+    for i in range(worker_count):
+        cells = [rng.choice(sites) if rng.random() < 0.8 else "" for _ in range(len(DAYS) * 2)]
+        halves = sum(1 for c in cells if c)
+        salario = 40000 + 500 * (i % 20)
+        bonus = rng.choice([0, 0, 0, 20000, 50000])
+        total = salario * halves // 2 + bonus
+        lines.append(";".join(
+            [f"{i + 1}. Trabajador {i + 1:03d}"] + cells + [str(salario), str(bonus), str(total), ""]
+        ))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def build_workdir(weeks: int, workers: int, seed: int) -> Path:
+    """
+    The app resolves schema.sql, instance/ and uploads/ relative to its
+    working directory, so a throwaway directory gives us an isolated DB.
+    """
+    workdir = Path(tempfile.mkdtemp(prefix="wukond-loadtest-"))
+    shutil.copy(REPO_ROOT / "schema.sql", workdir / "schema.sql")
+    (workdir / "instance").mkdir()
+    (workdir / "uploads").mkdir()
+
+    db_path = workdir / "instance" / "app.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript((REPO_ROOT / "schema.sql").read_text(encoding="utf-8"))
+    conn.close()
+
+    rng = random.Random(seed)
+    for kw in range(1, weeks + 1):
+        import_csv(BytesIO(make_week_csv(kw, workers, rng)), db_path=str(db_path))
+    return workdir
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SERVER
+# ─────────────────────────────────────────────────────────────────────────────
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workdir: Path, port: int, gunicorn_workers: int, env: dict):
+    if shutil.which("gunicorn"):
+        cmd = [
+            "gunicorn", "-w", str(gunicorn_workers), "-b", f"127.0.0.1:{port}",
+            "--log-level", "warning", "app:create_app()",
+        ]
+    else:
+        print("gunicorn not found, using the threaded Werkzeug server", file=sys.stderr)
+        cmd = [
+            sys.executable, "-c",
+            "import logging; logging.getLogger('werkzeug').setLevel(logging.WARNING)\n"
+            f"from app import create_app; create_app().run(port={port}, threaded=True)",
+        ]
+
+    env = {**os.environ, **env, "PYTHONPATH": str(REPO_ROOT)}
+    proc = subprocess.Popen(cmd, cwd=workdir, env=env)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/login", timeout=1)
+            return proc
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+
+    proc.terminate()
+    raise RuntimeError("Server did not start within 30s")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CLIENT
+# ─────────────────────────────────────────────────────────────────────────────
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, name, seconds, ok):
+        with self.lock:
+            self.latencies[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+
+
+class Client:
+    def __init__(self, base_url: str, stats: Stats, rng: random.Random):
+        self.base_url = base_url.rstrip("/")
+        self.stats = stats
+        self.rng = rng
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+
+    def request(self, name, path, data=None, headers=None, check=None):
+        """`check(url, body)` tells success apart when the status does not."""
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers or {})
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=60) as resp:
+                body = resp.read()
+                ok = resp.status < 400 and (check is None or check(resp.geturl(), body))
+        except (urllib.error.URLError, OSError):
+            body, ok = b"", False
+        self.stats.record(name, time.perf_counter() - start, ok)
+        return body
+
+    def login(self, user, password):
+        data = urllib.parse.urlencode({"username": user, "password": password}).encode()
+        req = urllib.request.Request(self.base_url + "/login", data=data)
+        with self.opener.open(req, timeout=30) as resp:
+            if urllib.parse.urlparse(resp.geturl()).path == "/login":
+                raise RuntimeError("Login failed, check WUKOND_USER / WUKOND_PASS")
+
+    def run_scenario(self, name, targets):
+        if name == "dashboard":
+            self.request("GET /", "/")
+        elif name == "worker" and targets["workers"]:
+            # The dashboard fires both calls at once when a worker is clicked
+            worker_id = self.rng.choice(targets["workers"])
+            pair = [
+                threading.Thread(target=self.request, args=(
+                    "GET /api/worker/<id>/profile", f"/api/worker/{worker_id}/profile")),
+                threading.Thread(target=self.request, args=(
+                    "GET /api/worker/<id>/charts", f"/api/worker/{worker_id}/charts")),
+            ]
+            for t in pair:
+                t.start()
+            for t in pair:
+                t.join()
+        elif name == "week_view" and targets["weeks"]:
+            year, kw = self.rng.choice(targets["weeks"])
+            self.request("GET /week/<year>/<kw>", f"/week/{year}/{kw}")
+        elif name == "upload" and targets["upload"]:
+            boundary = uuid.uuid4().hex
+            body = (
+                f"--{boundary}\r\n"
+                'Content-Disposition: form-data; name="file"; filename="week.csv"\r\n'
+                "Content-Type: text/csv\r\n\r\n"
+            ).encode() + targets["upload"] + f"\r\n--{boundary}--\r\n".encode()
+            self.request(
+                "POST /upload", "/upload", data=body,
+                headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+                check=upload_succeeded,
+            )
+
+
+def upload_succeeded(url: str, body: bytes) -> bool:
+    """
+    A failed import (writer busy, database locked, bad file) is rendered as
+    the upload form with status 200. Only the redirect to the week or the
+    overwrite confirmation means the week was stored.
+    """
+    if b'id="upload-error"' in body:
+        return False
+    return urllib.parse.urlparse(url).path.startswith("/week/") or b'action="/overwrite-week"' in body
+
+
+def discover_targets(client: Client, upload_csv: bytes | None) -> dict:
+    """Read worker ids and existing weeks from the pages, so --url works too."""
+    dashboard = client.request("discover", "/").decode("utf-8", "replace")
+    workers = [int(w) for w in re.findall(r'data-worker-id="(\d+)"', dashboard)]
+
+    weeks = []
+    overview = client.request("discover", "/weeks/2026").decode("utf-8", "replace")
+    years = {int(y) for y in re.findall(r'href="/weeks/(\d{4})"', overview)} or {2026}
+    for year in sorted(years):
+        page = client.request("discover", f"/weeks/{year}").decode("utf-8", "replace")
+        weeks += [(int(y), int(k)) for y, k in re.findall(r'href="/week/(\d{4})/(\d+)"', page)]
+
+    return {"workers": workers, "weeks": weeks, "upload": upload_csv}
+
+
+def client_loop(client, targets, deadline):
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[n] for n in names]
+    while time.monotonic() < deadline:
+        client.run_scenario(client.rng.choices(names, weights)[0], targets)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# REPORT
+# ─────────────────────────────────────────────────────────────────────────────
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def print_report(stats: Stats, elapsed: float):
+    header = f"{'endpoint':34} {'count':>7} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}"
+    print(header)
+    print("-" * len(header))
+
+    total = errors = 0
+    for name in sorted(stats.latencies):
+        if name == "discover":
+            continue
+        values = sorted(stats.latencies[name])
+        total += len(values)
+        errors += stats.errors[name]
+        print(
+            f"{name:34} {len(values):7d} {len(values) / elapsed:7.1f}"
+            f" {percentile(values, 50) * 1000:8.1f} {percentile(values, 95) * 1000:8.1f}"
+            f" {percentile(values, 99) * 1000:8.1f}"
+            f" {stats.errors[name] / len(values):6.1%}"
+        )
+
+    print("-" * len(header))
+    rate = errors / total if total else 0
+    print(f"{'total':34} {total:7d} {total / elapsed:7.1f} {'':8} {'':8} {'':8} {rate:6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="Target a running instance instead of starting one")
+    parser.add_argument("--user", default=os.environ.get("WUKOND_USER", "admin"))
+    parser.add_argument("--password", default=os.environ.get("WUKOND_PASS", "loadtest"))
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent simulated supervisors")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of traffic")
+    parser.add_argument("--gunicorn-workers", type=int, default=2)
+    parser.add_argument("--weeks", type=int, default=26, help="Synthetic weeks to import")
+    parser.add_argument("--workers", type=int, default=40, help="Synthetic workers per week")
+    parser.add_argument("--no-upload", action="store_true", help="Leave uploads out of the mix")
+    parser.add_argument(
+        "--allow-writes", action="store_true",
+        help="Send uploads to the --url instance too (overwrites real data)",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    proc = workdir = None
+    base_url = args.url
+    if not base_url:
+        print(f"Building synthetic DB: {args.weeks} weeks x {args.workers} workers")
+        workdir = build_workdir(args.weeks, args.workers, args.seed)
+        port = free_port()
+        proc = start_server(workdir, port, args.gunicorn_workers, {
+            "FLASK_SECRET_KEY": "loadtest",
+            "WUKOND_USER": args.user,
+            "WUKOND_PASS": args.password,
+        })
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        stats = Stats()
+        rng = random.Random(args.seed)
+        clients = [Client(base_url, stats, random.Random(rng.random())) for _ in range(args.clients)]
+        for client in clients:
+            client.login(args.user, args.password)
+
+        upload_csv = None
+        if args.no_upload:
+            pass
+        elif args.url and not args.allow_writes:
+            print("Uploads disabled against --url; pass --allow-writes to include them")
+        else:
+            upload_csv = make_week_csv(max(1, args.weeks), args.workers, random.Random(args.seed))
+        targets = discover_targets(clients[0], upload_csv)
+        print(
+            f"Running {args.clients} client(s) for {args.duration:.0f}s against {base_url}"
+            f" ({len(targets['workers'])} workers, {len(targets['weeks'])} weeks)"
+        )
+
+        start = time.monotonic()
+        deadline = start + args.duration
+        threads = [
+            threading.Thread(target=client_loop, args=(c, targets, deadline)) for c in clients
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        print_report(stats, time.monotonic() - start)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=10)
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()